@@ -15,5 +15,10 @@ setup(name='sportsref',
           'pandas',
           'pyquery',
           'requests',
-      ]
+      ],
+      entry_points={
+          'console_scripts': [
+              'sportsref-cache = sportsref.cache:main',
+          ],
+      },
       )
@@ -1,3 +1,7 @@
 import decorators
+import cache
+import freshness
+import session
+import ratelimit
 import utils
 import pfr
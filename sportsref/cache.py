@@ -0,0 +1,500 @@
+import argparse
+import collections
+import cPickle as pickle
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import urlparse
+import zlib
+
+import appdirs
+
+import sportsref
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+# errors decompress raises for an entry it can't decode
+DECODE_ERRORS = (ValueError, zlib.error) + ((zstd.ZstdError,) if zstd else ())
+
+__all__ = [
+    'CACHE_DIR',
+    'DB_FN',
+    'COMPRESSION',
+    'compress',
+    'decompress',
+    'MINIFY',
+    'minify',
+    'Entry',
+    'SQLiteStore',
+    'getStore',
+    'configure',
+    'main',
+]
+
+CACHE_DIR = appdirs.user_cache_dir('pfr', 'mgoldberg')
+DB_FN = os.path.join(CACHE_DIR, 'pages.sqlite')
+
+# caps on the page cache (None means no cap); least recently used pages are
+# evicted first
+MAX_BYTES = None
+MAX_ENTRIES = None
+# the caps are enforced once every this many writes
+PRUNE_EVERY = 100
+# last-access times are only rewritten when older than this many seconds
+ACCESS_RESOLUTION = 60
+
+# codec used for new cache entries: 'zstd', 'zlib', or None for raw HTML
+COMPRESSION = 'zstd' if zstd else 'zlib'
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+# compressed entries start with this marker followed by the codec name and a
+# newline; raw HTML never starts with a NUL byte, so old entries still read
+MARKER = '\x00sr:'
+
+def compress(text, codec=None):
+    """Compresses a page for storage in the cache.
+
+    :text: The (byte) string of HTML.
+    :codec: One of 'zstd', 'zlib' or None; defaults to COMPRESSION.
+    :returns: The byte string to store.
+    """
+    codec = codec or COMPRESSION
+    if not codec:
+        return text
+    if codec == 'zlib':
+        body = zlib.compress(text, ZLIB_LEVEL)
+    elif codec == 'zstd':
+        if zstd is None:
+            raise ValueError('zstd compression requires zstandard')
+        body = zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(text)
+    else:
+        raise ValueError('unknown compression codec: {}'.format(codec))
+    return '{}{}\n{}'.format(MARKER, codec, body)
+
+def decompress(blob):
+    """Reverses compress. Blobs without the format marker are returned as-is,
+    so uncompressed entries from older versions can still be read.
+
+    :blob: The byte string read from the cache.
+    :returns: The (byte) string of HTML.
+    """
+    if not blob.startswith(MARKER):
+        return blob
+    nl = blob.index('\n')
+    codec = blob[len(MARKER):nl]
+    body = blob[nl+1:]
+    if codec == 'zlib':
+        return zlib.decompress(body)
+    elif codec == 'zstd':
+        if zstd is None:
+            raise ValueError('zstd-compressed entry requires zstandard')
+        return zstd.ZstdDecompressor().decompress(body)
+    else:
+        raise ValueError('unknown compression codec: {}'.format(codec))
+
+# strip markup that no parser reads (see minify) from pages before caching
+# them; pages cached before turning this on are kept as they are
+MINIFY = False
+# bump whenever minify changes what it removes; pages minified by another
+# version are treated as missing and fetched again
+MINIFY_VERSION = 1
+
+# leftmost match wins, so a comment that mentions <script> (or a script that
+# contains '<!--') is removed as a whole
+_STRIP_RE = re.compile(
+    r'<!--.*?-->|'
+    r'<(script|style|noscript|iframe|template)\b[^>]*>.*?</\1\s*>|'
+    r'<link\b[^>]*>',
+    re.DOTALL | re.IGNORECASE
+)
+
+def minify(text):
+    """Removes the parts of a page that none of sportsref's parsers read:
+    comments, scripts, styles, noscript/iframe/template contents and link
+    tags. Everything else, including whitespace, is left exactly as it was,
+    so the rest of the page parses to the same tree.
+
+    :text: The (byte) string of HTML.
+    :returns: The minified HTML.
+    """
+    return _STRIP_RE.sub('', text)
+
+# a cached page: text is the HTML, fetched is when it was last (re)validated
+Entry = collections.namedtuple(
+    'Entry', ['text', 'etag', 'lastModified', 'fetched']
+)
+
+class SQLiteStore(object):
+
+    """Page cache kept in a single SQLite file and keyed by the full URL, so
+    long finder query URLs are cached like any other page. Each thread (and
+    each forked process) gets its own connection; writes are transactions,
+    so readers never see a partially written page.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            fetched REAL NOT NULL,
+            accessed REAL NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL DEFAULT 0,
+            minified INTEGER NOT NULL DEFAULT 0
+        )
+    """
+
+    # DataFrames parsed from cached pages; rows are dropped whenever their
+    # page is replaced or evicted
+    TABLES_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tables (
+            url TEXT NOT NULL,
+            key TEXT NOT NULL,
+            version TEXT NOT NULL,
+            body BLOB NOT NULL,
+            PRIMARY KEY (url, key)
+        )
+    """
+
+    def __init__(self, path=DB_FN, maxBytes=None, maxEntries=None,
+                 minify=False):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.maxEntries = maxEntries
+        self.minify = minify
+        self._local = threading.local()
+        self._numPuts = 0
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            dirname = os.path.dirname(self.path)
+            if dirname and not os.path.isdir(dirname):
+                try:
+                    os.makedirs(dirname)
+                except OSError:
+                    pass
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.text_factory = str
+            # WAL lets readers proceed while another process writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(self.SCHEMA)
+            conn.execute(self.TABLES_SCHEMA)
+            self._migrate(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _migrate(self, conn):
+        # add columns missing from stores created by older versions
+        cols = {row[1] for row in conn.execute('PRAGMA table_info(pages)')}
+        with conn:
+            if 'accessed' not in cols:
+                conn.execute('ALTER TABLE pages ADD COLUMN '
+                             'accessed REAL NOT NULL DEFAULT 0')
+                conn.execute('UPDATE pages SET accessed = fetched')
+            if 'size' not in cols:
+                conn.execute('ALTER TABLE pages ADD COLUMN '
+                             'size INTEGER NOT NULL DEFAULT 0')
+                conn.execute('UPDATE pages SET size = length(body)')
+            if 'minified' not in cols:
+                conn.execute('ALTER TABLE pages ADD COLUMN '
+                             'minified INTEGER NOT NULL DEFAULT 0')
+            conn.execute('CREATE INDEX IF NOT EXISTS pages_accessed '
+                         'ON pages (accessed)')
+
+    def get(self, url):
+        """Returns the cached Entry for `url`, or None if it isn't cached or
+        can't be decoded here (e.g., it was compressed with zstd and the
+        zstandard package isn't installed), so that the page is fetched again.
+        """
+        row = self._conn().execute(
+            'SELECT body, etag, last_modified, fetched, accessed, minified '
+            'FROM pages WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            return _importLegacy(self, url)
+        body, etag, lastModified, fetched, accessed, minified = row
+        if minified and minified != MINIFY_VERSION:
+            # stripped by another version of minify; may be missing parts
+            # this version keeps
+            return None
+        try:
+            text = decompress(str(body))
+        except DECODE_ERRORS:
+            return None
+        now = time.time()
+        if now - accessed > ACCESS_RESOLUTION:
+            with self._conn() as conn:
+                conn.execute('UPDATE pages SET accessed = ? WHERE url = ?',
+                             (now, url))
+        return Entry(text, etag, lastModified, fetched)
+
+    def put(self, url, text, etag=None, lastModified=None, fetched=None):
+        """Stores (or replaces) the page for `url`, minifying it first if the
+        store minifies pages.
+
+        :returns: The text as stored.
+        """
+        now = time.time()
+        fetched = now if fetched is None else fetched
+        if self.minify:
+            text = minify(text)
+        blob = compress(text)
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO pages '
+                '(url, body, etag, last_modified, fetched, accessed, size, '
+                'minified) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, sqlite3.Binary(blob), etag, lastModified, fetched, now,
+                 len(blob), MINIFY_VERSION if self.minify else 0)
+            )
+            conn.execute('DELETE FROM tables WHERE url = ?', (url,))
+        self._numPuts += 1
+        if ((self.maxBytes or self.maxEntries) and
+                self._numPuts % PRUNE_EVERY == 0):
+            self.prune()
+        return text
+
+    def touch(self, url, fetched=None):
+        """Marks the cached page for `url` as just revalidated."""
+        fetched = time.time() if fetched is None else fetched
+        with self._conn() as conn:
+            conn.execute('UPDATE pages SET fetched = ? WHERE url = ?',
+                         (fetched, url))
+
+    def delete(self, url):
+        """Removes the page for `url` from the cache, if present."""
+        with self._conn() as conn:
+            conn.execute('DELETE FROM pages WHERE url = ?', (url,))
+            conn.execute('DELETE FROM tables WHERE url = ?', (url,))
+
+    def __contains__(self, url):
+        return self._conn().execute(
+            'SELECT 1 FROM pages WHERE url = ?', (url,)
+        ).fetchone() is not None
+
+    def urls(self, prefix=''):
+        """Lists the cached URLs, optionally only those starting with
+        `prefix`.
+
+        :returns: A list of URL strings.
+        """
+        rows = self._conn().execute(
+            'SELECT url FROM pages WHERE substr(url, 1, ?) = ? ORDER BY url',
+            (len(prefix), prefix)
+        )
+        return [url for url, in rows]
+
+    def getTable(self, url, key, version):
+        """Returns a DataFrame previously stored with putTable, along with
+        when its page was fetched (so the caller can check the page's
+        freshness).
+
+        :url: The URL of the page the table was parsed from.
+        :key: Identifies the table within the page (e.g., its selector).
+        :version: The parser version the DataFrame must have been built with.
+        :returns: A (DataFrame, fetched) tuple, or (None, None) if there is no
+        usable stored DataFrame.
+        """
+        row = self._conn().execute(
+            'SELECT t.body, p.fetched FROM tables AS t '
+            'JOIN pages AS p ON p.url = t.url '
+            'WHERE t.url = ? AND t.key = ? AND t.version = ?',
+            (url, key, version)
+        ).fetchone()
+        if row is None:
+            return None, None
+        body, fetched = row
+        try:
+            df = pickle.loads(decompress(str(body)))
+        except Exception:
+            # written by an incompatible version of pandas; treat as a miss
+            return None, None
+        return df, fetched
+
+    def putTable(self, url, key, version, df):
+        """Stores a DataFrame parsed from the cached page at `url`. Nothing is
+        stored if that page isn't in the cache.
+        """
+        blob = compress(pickle.dumps(df, pickle.HIGHEST_PROTOCOL))
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO tables (url, key, version, body) '
+                'SELECT url, ?, ?, ? FROM pages WHERE url = ?',
+                (key, version, sqlite3.Binary(blob), url)
+            )
+
+    def stats(self):
+        """Summarizes the contents of the cache.
+
+        :returns: A dict with the number of entries, their total (compressed)
+        size in bytes, the size of the database file on disk, and the oldest
+        and newest access times.
+        """
+        numEntries, numBytes, oldest, newest = self._conn().execute(
+            'SELECT count(*), coalesce(sum(size), 0), min(accessed), '
+            'max(accessed) FROM pages'
+        ).fetchone()
+        fileBytes = sum(
+            os.path.getsize(fn)
+            for fn in (self.path, self.path + '-wal')
+            if os.path.isfile(fn)
+        )
+        return {
+            'entries': numEntries,
+            'bytes': numBytes,
+            'fileBytes': fileBytes,
+            'oldestAccess': oldest,
+            'newestAccess': newest,
+        }
+
+    def prune(self, maxBytes=None, maxEntries=None):
+        """Evicts the least recently used pages until the cache is within the
+        given caps (by default, the store's own caps).
+
+        :maxBytes: Max total size of the stored (compressed) pages.
+        :maxEntries: Max number of stored pages.
+        :returns: The number of pages evicted.
+        """
+        maxBytes = self.maxBytes if maxBytes is None else maxBytes
+        maxEntries = self.maxEntries if maxEntries is None else maxEntries
+        if maxBytes is None and maxEntries is None:
+            return 0
+        with self._conn() as conn:
+            rows = conn.execute(
+                'SELECT url, size FROM pages ORDER BY accessed DESC'
+            ).fetchall()
+            numBytes = 0
+            toEvict = []
+            for i, (url, size) in enumerate(rows):
+                numBytes += size
+                if ((maxEntries is not None and i >= maxEntries) or
+                        (maxBytes is not None and numBytes > maxBytes)):
+                    toEvict.append((url,))
+            conn.executemany('DELETE FROM pages WHERE url = ?', toEvict)
+            conn.executemany('DELETE FROM tables WHERE url = ?', toEvict)
+        return len(toEvict)
+
+    def vacuum(self):
+        """Shrinks the database file after pages have been evicted."""
+        self._conn().execute('VACUUM')
+
+def _legacyFN(url):
+    """Returns the path of the flat file that older versions used to cache
+    `url`.
+    """
+    parsed = urlparse.urlparse(url)
+    relURL = parsed.path
+    if parsed.query:
+        relURL += '?' + parsed.query
+    return os.path.join(CACHE_DIR, relURL.replace('/', ''))
+
+def _importLegacy(store, url):
+    """Moves a page cached by older versions (one flat file per page) into
+    `store`.
+
+    :returns: The imported Entry, or None if there was no such file.
+    """
+    fn = _legacyFN(url)
+    metaFN = fn + '.meta'
+    try:
+        with open(fn, 'rb') as f:
+            text = decompress(f.read())
+        fetched = os.path.getmtime(fn)
+    except (IOError, OSError) + DECODE_ERRORS:
+        return None
+    meta = {}
+    if os.path.isfile(metaFN):
+        with open(metaFN, 'r') as f:
+            meta = json.load(f)
+    text = store.put(url, text, meta.get('etag'), meta.get('lastModified'),
+                     fetched)
+    entry = Entry(text, meta.get('etag'), meta.get('lastModified'), fetched)
+    for oldFN in (fn, metaFN):
+        try:
+            os.remove(oldFN)
+        except OSError:
+            pass
+    return entry
+
+_store = None
+_storeLock = sportsref.decorators.ForkSafeLock()
+
+def getStore():
+    """Returns the module-level SQLiteStore, creating it if necessary."""
+    global _store
+    if _store is None:
+        with _storeLock:
+            if _store is None:
+                _store = SQLiteStore(DB_FN, MAX_BYTES, MAX_ENTRIES, MINIFY)
+    return _store
+
+def configure(maxBytes=None, maxEntries=None, path=None, minify=None):
+    """Changes the settings of the shared page cache.
+
+    :maxBytes: Max total size of the stored (compressed) pages; 0 for no cap.
+    :maxEntries: Max number of stored pages; 0 for no cap.
+    :path: Path of the SQLite database file.
+    :minify: Whether to strip unused markup from pages before storing them.
+    :returns: None
+    """
+    global MAX_BYTES, MAX_ENTRIES, DB_FN, MINIFY, _store
+    with _storeLock:
+        if maxBytes is not None:
+            MAX_BYTES = maxBytes or None
+        if maxEntries is not None:
+            MAX_ENTRIES = maxEntries or None
+        if path is not None:
+            DB_FN = path
+        if minify is not None:
+            MINIFY = minify
+        _store = None
+
+def main(argv=None):
+    """Entry point for `sportsref-cache`, which reports the size of the page
+    cache and prunes it.
+    """
+    parser = argparse.ArgumentParser(
+        prog='sportsref-cache', description='Manage the sportsref page cache.'
+    )
+    parser.add_argument('--path', default=None,
+                        help='cache database (default: {})'.format(DB_FN))
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('stats', help='report the size of the cache')
+    pruneParser = sub.add_parser(
+        'prune', help='evict least recently used pages'
+    )
+    pruneParser.add_argument('--max-bytes', type=int, default=None)
+    pruneParser.add_argument('--max-entries', type=int, default=None)
+    pruneParser.add_argument('--vacuum', action='store_true',
+                             help='shrink the database file afterwards')
+    args = parser.parse_args(argv)
+
+    store = SQLiteStore(args.path or DB_FN)
+    if args.command == 'prune':
+        if args.max_bytes is None and args.max_entries is None:
+            parser.error('prune needs --max-bytes and/or --max-entries')
+        numEvicted = store.prune(args.max_bytes, args.max_entries)
+        print 'Evicted {} pages'.format(numEvicted)
+        if args.vacuum:
+            store.vacuum()
+    stats = store.stats()
+    print 'Entries:   {}'.format(stats['entries'])
+    print 'Size:      {:.1f} MB'.format(stats['bytes'] / 1e6)
+    print 'On disk:   {:.1f} MB'.format(stats['fileBytes'] / 1e6)
+    for label, key in (('Oldest access', 'oldestAccess'),
+                       ('Newest access', 'newestAccess')):
+        if stats[key]:
+            print '{}: {}'.format(label, time.ctime(stats[key]))
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,48 @@
 import collections
-import datetime
 import functools
 import os
-import re
+import sys
+import threading
 import time
-import urlparse
+import weakref
 
-import appdirs
 import numpy as np
 import pandas as pd
 
+import sportsref
+
+class ForkSafeLock(object):
+
+    """A lock (used with `with`) that is replaced by a fresh one in a forked
+    child process. Otherwise, a lock held by another thread at the moment of
+    the fork would stay locked forever in the child. `onFork`, if given, is
+    called in the child to reset whatever state the lock protects.
+    """
+
+    def __init__(self, reentrant=False, onFork=None):
+        self._factory = threading.RLock if reentrant else threading.Lock
+        self._onFork = onFork
+        self._lock = self._factory()
+        self._pid = os.getpid()
+
+    def __enter__(self):
+        if self._pid != os.getpid():
+            self._lock = self._factory()
+            self._pid = os.getpid()
+            if self._onFork:
+                self._onFork()
+        return self._lock.__enter__()
+
+    def __exit__(self, *excInfo):
+        return self._lock.__exit__(*excInfo)
+
 def switchToDir(dirPath):
     """
     Decorator that switches to given directory before executing function, and
     then returning to orignal directory.
+
+    Note that the working directory is process-wide, so this is not safe to
+    use from multiple threads; sportsref itself no longer uses it.
     """
 
     def decorator(func):
@@ -30,114 +59,378 @@ def switchToDir(dirPath):
 
 def cacheHTML(func):
     """Caches the HTML returned by the specified function `func`. Caches it in
-    the user cache determined by the appdirs package.
-    """
+    the SQLite store in the user cache directory determined by the appdirs
+    package (see sportsref.cache).
 
-    CACHE_DIR = appdirs.user_cache_dir('pfr', 'mgoldberg')
-    if not os.path.isdir(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
+    `func(url, headers)` must return a requests.Response. The response's ETag
+    and Last-Modified validators are saved along with the HTML; when a cached
+    page goes stale, it is revalidated with a conditional GET, and a 304 Not
+    Modified just marks the cached copy as fresh again. Whether a page is
+    stale is decided by sportsref.freshness.
+    """
 
     @functools.wraps(func)
     def wrapper(url):
-        parsed = urlparse.urlparse(url)
-        relURL = parsed.path
-        if parsed.query:
-            relURL += '?' + parsed.query
-        noPathFN = relURL.replace('/', '')
-        fn = '{}/{}'.format(CACHE_DIR, noPathFN)
-
-        # TODO: fix this problem?
-        if len(noPathFN) > 255:
-            # filename is too long, just evaluate the function
-            return func(url).decode('utf-8', 'ignore')
-        
-        # set time variables (in seconds)
-        if os.path.isfile(fn):
-            modtime = int(os.path.getmtime(fn))
-            curtime = int(time.time())
-
-        def cacheValid(ct, mt, fn):
-            # first, if we can ensure that the file won't change,
-            # then we're safe caching it
-            if 'boxscore' in fn:
-                return True
-            m = re.search(r'(\d{4})', fn)
-            if m:
-                year = int(m.group(1))
-                now = datetime.datetime.now()
-                curSeason = now.year - (1 if now.month <= 2 else 0)
-                if year < curSeason:
-                    return True
-
-            # otherwise, check if it's currently the offseason
-            today = datetime.date.today()
-            endOfSeason = datetime.date(today.year, 2, 10)
-            startOfSeason = datetime.date(today.year, 9, 1)
-            # if we're in the offseason, don't worry about it
-            if endOfSeason < today < startOfSeason:
-                return True
-
-            # otherwise, check if new data could have been updated since mod
-            # (assumed that new game data is added the day after that game)
-            modDay = today - datetime.timedelta(seconds=ct-mt)
-            lastGameDay = today
-            while (lastGameDay.weekday() + 1) % 7 not in (0, 1, 2, 5):
-                lastGameDay = lastGameDay - datetime.timedelta(days=1)
-            return modDay >= lastGameDay
-
-        # if file found and caching is valid, read from file
-        if os.path.isfile(fn) and cacheValid(curtime, modtime, fn):
-            with open(fn, 'r') as f:
-                text = f.read()
-            return text
-        # otherwise, download html and cache it
-        else:
-            text = func(url)
-            with open(fn, 'w+') as f:
-                f.write(text)
-            return text
-    
+        store = sportsref.cache.getStore()
+        entry = store.get(url)
+
+        # if page found and caching is valid, return the cached copy
+        if entry and sportsref.freshness.isFresh(url, entry.fetched):
+            return entry.text
+
+        # otherwise, revalidate the cached copy if we have validators for it
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.lastModified:
+            headers['If-Modified-Since'] = entry.lastModified
+
+        resp = func(url, headers)
+        if headers and resp.status_code == 304:
+            # not modified: mark the cached copy as fresh again
+            store.touch(url)
+            return entry.text
+
+        # download html and cache it along with its validators
+        return store.put(url, resp.content, resp.headers.get('ETag'),
+                         resp.headers.get('Last-Modified'))
+
+    return wrapper
+
+def singleFlight(func):
+    """Coalesces concurrent calls with the same arguments: while one call is
+    running, other threads asking for the same thing wait for it to finish
+    and share its result (or exception) instead of repeating the work.
+    """
+
+    class Call(object):
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.excInfo = None
+
+    inFlight = {}
+    # calls in flight in the parent process will never finish in a child
+    lock = ForkSafeLock(onFork=inFlight.clear)
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        with lock:
+            call = inFlight.get(args)
+            isLeader = call is None
+            if isLeader:
+                call = inFlight[args] = Call()
+
+        # another thread is already doing the work; wait for its result
+        if not isLeader:
+            call.done.wait()
+            if call.excInfo:
+                raise call.excInfo[0], call.excInfo[1], call.excInfo[2]
+            return call.result
+
+        try:
+            call.result = func(*args)
+        except:
+            call.excInfo = sys.exc_info()
+            raise
+        finally:
+            with lock:
+                del inFlight[args]
+            call.done.set()
+        return call.result
+
     return wrapper
 
-def memoized(fun):
-    """A simple memoize decorator."""
+# defaults for memoized functions that don't set their own limits (None means
+# unbounded); change with configureMemoization
+MEMO_MAXSIZE = None
+MEMO_MAXBYTES = None
+MEMO_TTL = None
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'maxsize', 'maxbytes', 'ttl', 'currsize',
+                  'currbytes']
+)
+
+# every memoized function, so their caches can be cleared all at once
+_memoizedFuncs = []
+
+def configureMemoization(maxsize=None, maxbytes=None, ttl=None):
+    """Sets the default limits for memoized functions that don't set their
+    own. Takes effect on the next call of each function.
+
+    :maxsize: Max number of cached results per function; 0 for no limit.
+    :maxbytes: Max approximate size in bytes of the cached results per
+    function; 0 for no limit.
+    :ttl: Number of seconds after which a cached result expires; 0 for never.
+    :returns: None
+    """
+    global MEMO_MAXSIZE, MEMO_MAXBYTES, MEMO_TTL
+    if maxsize is not None:
+        MEMO_MAXSIZE = maxsize or None
+    if maxbytes is not None:
+        MEMO_MAXBYTES = maxbytes or None
+    if ttl is not None:
+        MEMO_TTL = ttl or None
+
+def clearMemoized():
+    """Clears the caches of all memoized functions."""
+    for func in _memoizedFuncs:
+        func.cache_clear()
+
+def _sizeOf(obj):
+    """Approximate size of an object in bytes, used for memoized's maxbytes.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    elif isinstance(obj, np.ndarray):
+        return obj.nbytes
+    elif isinstance(obj, basestring):
+        return len(obj)
+    else:
+        return sys.getsizeof(obj)
+
+# deal with lists in args
+_isList = lambda a: isinstance(a, list) or isinstance(a, np.ndarray)
+def _deListify(arg):
+    if _isList(arg):
+        return tuple(map(_deListify, arg))
+    else:
+        return arg
+
+# deal with dicts in args
+_isDict = lambda d: isinstance(d, dict) or isinstance(d, pd.Series)
+def _deDictify(arg):
+    if _isDict(arg):
+        items = dict(arg).items()
+        items = [(k, _deListify(_deDictify(v))) for k, v in items]
+        return frozenset(sorted(items))
+    else:
+        return arg
+
+_CONTAINER_TYPES = (list, np.ndarray, dict, pd.Series)
+
+# argument types that never need converting (checked before the slower
+# isinstance test)
+_PLAIN_TYPES = frozenset([str, unicode, int, long, float, bool, type(None)])
+_NO_KWARGS = frozenset()
+
+def _makeKey(args, kwargs):
+    """Builds a hashable cache key out of a function's arguments."""
+    if not kwargs:
+        for a in args:
+            if (type(a) not in _PLAIN_TYPES and
+                    isinstance(a, _CONTAINER_TYPES)):
+                break
+        else:
+            # common case: nothing to convert
+            return (args, _NO_KWARGS)
+    clean_args = tuple(map(_deListify, args))
+    clean_args = tuple(map(_deDictify, clean_args))
+    clean_kwargs = _deDictify(kwargs)
+    return (clean_args, clean_kwargs)
+
+def fieldsKey(fields):
+    """Returns a key function for memoized that identifies a dict/Series
+    first argument by just the given fields (plus the remaining arguments),
+    instead of hashing every field. Missing values (None, NaN, NaT) all make
+    the same key.
+
+    :fields: The names of the fields the function actually reads.
+    :returns: A key function.
+    """
+    fields = tuple(fields)
+    def key(struct, *args, **kwargs):
+        return (tuple(_keyValue(struct.get(f)) for f in fields),
+                tuple(map(_keyValue, args)),
+                frozenset((k, _keyValue(v)) for k, v in kwargs.iteritems()))
+    return key
+
+def _keyValue(value):
+    # NaN != NaN, so two missing values (e.g., separate NaN objects from a
+    # DataFrame) would never make equal keys; map them all to None
+    if pd.api.types.is_scalar(value) and pd.isnull(value):
+        return None
+    return value
+
+# what memoized's lookup returns for a missing or expired entry
+_MISS = object()
+
+def memoized(fun=None, maxsize=None, maxbytes=None, ttl=None, key=None):
+    """A memoize decorator with an LRU cache that can be bounded by number of
+    entries and/or approximate size in bytes, and whose entries can expire.
+
+    Use as @memoized, or as @memoized(maxsize=..., maxbytes=..., ttl=...,
+    key=...) to override the module-wide defaults (see configureMemoization).
+    By default, list and dict/Series arguments are converted to hashable
+    keys; `key`, if given, is called with the function's arguments and
+    returns the cache key instead (see fieldsKey). The wrapper has
+    cache_info() and cache_clear() methods, and cache_get_many() and
+    cache_put_many() to read and fill the memo directly.
+    """
+    if fun is None:
+        return lambda f: memoized(f, maxsize, maxbytes, ttl, key)
+
+    def makeKey(args, kwargs):
+        if key is not None:
+            return key(*args, **kwargs)
+        else:
+            return _makeKey(args, kwargs)
+
+    def lookup(k, now=None):
+        # returns the live entry's result, or _MISS; counts a hit or a miss.
+        # The caller holds the lock.
+        hit = cache.pop(k, None)
+        if hit is not None and (hit[1] is None or
+                                hit[1] > (now or time.time())):
+            # re-insert to mark as most recently used
+            cache[k] = hit
+            stats['hits'] += 1
+            return hit[0]
+        elif hit is not None:
+            # expired
+            stats['bytes'] -= hit[2]
+        stats['misses'] += 1
+        return _MISS
+
+    def store(items):
+        # memoizes each (key, result) pair in `items`
+        maxS = maxsize or MEMO_MAXSIZE
+        maxB = maxbytes or MEMO_MAXBYTES
+        secs = ttl or MEMO_TTL
+        expires = time.time() + secs if secs else None
+        items = [(k, ret, _sizeOf(ret) if maxB else 0) for k, ret in items]
+        with lock:
+            for k, ret, size in items:
+                old = cache.pop(k, None)
+                if old is not None:
+                    stats['bytes'] -= old[2]
+                cache[k] = (ret, expires, size)
+                stats['bytes'] += size
+            # evict least recently used entries
+            while cache and ((maxS and len(cache) > maxS) or
+                             (maxB and stats['bytes'] > maxB)):
+                _, (_, _, oldSize) = cache.popitem(last=False)
+                stats['bytes'] -= oldSize
+
     @functools.wraps(fun)
     def wrapper(*args, **kwargs):
-
-        # deal with lists in args
-        isList = lambda a: isinstance(a, list) or isinstance(a, np.ndarray)
-        def deListify(arg):
-            if isList(arg):
-                return tuple(map(deListify, arg))
-            else:
-                return arg
-
-        # deal with dicts in args
-        isDict = lambda d: isinstance(d, dict) or isinstance(d, pd.Series)
-        def deDictify(arg):
-            if isDict(arg):
-                items = dict(arg).items()
-                items = [(k, deListify(deDictify(v))) for k, v in items]
-                return frozenset(sorted(items))
-            else:
-                return arg
-        
-        clean_args = tuple(map(deListify, args))
-        clean_args = tuple(map(deDictify, clean_args))
-        clean_kwargs = deDictify(kwargs)
-
-        key = (clean_args, clean_kwargs)
+        k = makeKey(args, kwargs)
         try:
-            ret = cache[key]
+            with lock:
+                ret = lookup(k)
+        except TypeError:
+            print 'memoization type error here', fun.__name__, k
+            return fun(*args, **kwargs)
+        if ret is not _MISS:
             return ret
+
+        ret = fun(*args, **kwargs)
+        store([(k, ret)])
+        return ret
+
+    def cache_get_many(argsList):
+        """Looks up the memoized results for many calls at once, without
+        calling the function.
+
+        :argsList: An iterable of argument tuples.
+        :returns: A dict mapping each argument tuple that has a memoized
+        result to that result.
+        """
+        keyed = [(args, makeKey(args, {})) for args in argsList]
+        found = {}
+        now = time.time()
+        with lock:
+            for args, k in keyed:
+                ret = lookup(k, now)
+                if ret is not _MISS:
+                    found[args] = ret
+        return found
+
+    def cache_put_many(items):
+        """Memoizes results computed elsewhere, e.g., in bulk for many
+        arguments at once.
+
+        :items: An iterable of (argument tuple, result) pairs.
+        """
+        store([(makeKey(args, {}), ret) for args, ret in items])
+
+    def cache_info():
+        with lock:
+            return CacheInfo(
+                stats['hits'], stats['misses'], maxsize or MEMO_MAXSIZE,
+                maxbytes or MEMO_MAXBYTES, ttl or MEMO_TTL, len(cache),
+                stats['bytes']
+            )
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            stats.update(hits=0, misses=0, bytes=0)
+
+    # key -> (result, expiration time or None, size in bytes)
+    cache = collections.OrderedDict()
+    stats = {'hits': 0, 'misses': 0, 'bytes': 0}
+    lock = ForkSafeLock(reentrant=True)
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    wrapper.cache_get_many = cache_get_many
+    wrapper.cache_put_many = cache_put_many
+    wrapper.__wrapped__ = fun
+    _memoizedFuncs.append(wrapper)
+    return wrapper
+
+def memoizedMethod(fun):
+    """Memoizes a method in a cache stored on the instance itself, rather than
+    in a module-wide dict keyed on `self`; cached results (documents,
+    DataFrames, ...) are freed along with the instance. Threads sharing an
+    instance compute each result once: the others wait for it.
+    """
+    name = fun.__name__
+
+    @functools.wraps(fun)
+    def wrapper(self, *args, **kwargs):
+        try:
+            k = _makeKey(args, kwargs)
+            memo = self.__dict__.setdefault('_memo', {}).setdefault(name, {})
+            return memo[k]
         except KeyError:
-            ret = cache[key] = fun(*args, **kwargs)
-            return ret
+            pass
         except TypeError:
-            print 'memoization type error here', fun.__name__, key
-            return fun(*args, **kwargs)
+            print 'memoization type error here', name, k
+            return fun(self, *args, **kwargs)
+
+        # dict.setdefault is atomic, so racing threads get the same lock
+        locks = self.__dict__.setdefault('_memoLocks', {})
+        lock = locks.get(name)
+        if lock is None:
+            lock = locks.setdefault(name, ForkSafeLock(reentrant=True))
+        with lock:
+            try:
+                return memo[k]
+            except KeyError:
+                ret = memo[k] = fun(self, *args, **kwargs)
+                return ret
+
+    return wrapper
+
+def weakMemoized(cls):
+    """Memoizes a class's constructor: while an instance created with the
+    same arguments is still alive, it is returned instead of a new one. The
+    registry only holds weak references, so instances (and their
+    memoizedMethod caches) are freed once callers drop them.
+    """
+    @functools.wraps(cls)
+    def wrapper(*args, **kwargs):
+        k = _makeKey(args, kwargs)
+        with lock:
+            inst = instances.get(k)
+            if inst is None:
+                inst = instances[k] = cls(*args, **kwargs)
+        return inst
 
-    cache = {}
+    instances = weakref.WeakValueDictionary()
+    lock = ForkSafeLock(reentrant=True)
     return wrapper
 
 def kindRPB(fun):
@@ -156,7 +449,8 @@ def kindRPB(fun):
             kwargs['kind'] = 'P'
             poffs = fun(*args, **kwargs)
             poffs['game_type'] = 'P'
-            return pd.concat((reg, poffs), ignore_index=True)
+            return sportsref.utils.concatTables((reg, poffs),
+                                                ignore_index=True)
         else:
             df = fun(*args, **kwargs)
             df['game_type'] = kind
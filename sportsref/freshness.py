@@ -0,0 +1,152 @@
+import datetime
+import time
+import urlparse
+
+import sportsref
+
+__all__ = [
+    'FOREVER',
+    'NEXT_UPDATE',
+    'TTLS',
+    'classify',
+    'configure',
+    'isFresh',
+]
+
+HOUR = 60*60
+DAY = 24*HOUR
+
+# the page never changes once it exists
+FOREVER = float('inf')
+# the page is fresh until the next day on which new game data shows up
+NEXT_UPDATE = 'nextUpdate'
+
+# TTL (in seconds, or FOREVER/NEXT_UPDATE) for each class of URL; see
+# classify for the classes. Change with configure().
+TTLS = {
+    'boxscore': FOREVER,
+    'player': NEXT_UPDATE,
+    'team': NEXT_UPDATE,
+    'teamSeason': NEXT_UPDATE,
+    'season': NEXT_UPDATE,
+    'pastSeason': FOREVER,
+    'finder': NEXT_UPDATE,
+    'constants': 7*DAY,
+    'other': NEXT_UPDATE,
+}
+
+# regular season + playoffs run from Sep 1 through Feb 10; in between, nothing
+# changes and every page stays fresh
+SEASON_START = (9, 1)
+SEASON_END = (2, 10)
+
+# new game data is added the day after a game; games are played on Thu, Sat,
+# Sun and Mon, so data shows up on Fri, Sun, Mon and Tue. Indexed by
+# date.weekday(), the number of days back to the most recent update day.
+DAYS_SINCE_UPDATE = (0, 0, 1, 2, 0, 1, 0)
+
+def _pathYear(parts):
+    """Finds the season in the segments of a URL's path, e.g. the 2014 in
+    /years/2014/, /teams/nwe/2014_roster.htm or
+    /players/B/BradTo00/gamelog/2014/.
+
+    :parts: The path split on '/'.
+    :returns: The year as an int, or None if the path has no season in it.
+    """
+    for part in parts[2:]:
+        if part[:4].isdigit() and not part[4:5].isdigit():
+            return int(part[:4])
+    return None
+
+def classify(url):
+    """Determines the class of a PFR URL for the freshness policy.
+
+    :url: An absolute or relative URL.
+    :returns: A (class, year) tuple; year is the season in the URL's path, or
+    None for boxscores, finder queries and pages without a season.
+    """
+    parsed = urlparse.urlsplit(url)
+    parts = parsed.path.split('/')
+    section = parts[1] if len(parts) > 1 else ''
+    if section == 'boxscores' and len(parts) > 2 and parts[2]:
+        return 'boxscore', None
+    elif section == 'play-index':
+        return ('finder' if parsed.query else 'constants'), None
+    year = _pathYear(parts)
+    if section == 'players':
+        return 'player', year
+    elif section == 'teams':
+        # /teams/nwe/2014.htm (and /teams/nwe/2014_roster.htm, etc.)
+        return ('teamSeason' if year else 'team'), year
+    elif section == 'years' and year:
+        return 'season', year
+    return 'other', year
+
+class _Calendar(object):
+
+    """The NFL calendar as of one day: the current season, whether it's the
+    offseason, and when the most recent data update started. Rebuilt once a
+    day rather than on every lookup.
+    """
+
+    def __init__(self, now):
+        today = datetime.date.fromtimestamp(now)
+        self.season = today.year - (1 if today.month <= 2 else 0)
+        self.offseason = (
+            datetime.date(today.year, *SEASON_END) < today <
+            datetime.date(today.year, *SEASON_START)
+        )
+        lastUpdate = today - datetime.timedelta(
+            days=DAYS_SINCE_UPDATE[today.weekday()]
+        )
+        self.lastUpdate = time.mktime(lastUpdate.timetuple())
+        self.starts = time.mktime(today.timetuple())
+        self.expires = time.mktime(
+            (today + datetime.timedelta(days=1)).timetuple()
+        )
+
+_calendar = None
+_calendarLock = sportsref.decorators.ForkSafeLock()
+
+def _getCalendar(now):
+    global _calendar
+    cal = _calendar
+    if cal is None or not cal.starts <= now < cal.expires:
+        with _calendarLock:
+            cal = _calendar = _Calendar(now)
+    return cal
+
+def isFresh(url, fetched, now=None):
+    """Decides whether a cached copy of a page is still fresh.
+
+    :url: The URL of the page.
+    :fetched: When the cached copy was fetched or last revalidated, in
+    seconds since the epoch.
+    :now: The current time; defaults to time.time().
+    :returns: True if the cached copy can be used without revalidating it.
+    """
+    now = time.time() if now is None else now
+    urlClass, year = classify(url)
+    cal = _getCalendar(now)
+    # pages about a finished season never change
+    if year is not None and year < cal.season:
+        urlClass = 'pastSeason'
+    ttl = TTLS[urlClass]
+    if ttl == NEXT_UPDATE:
+        return cal.offseason or fetched >= cal.lastUpdate
+    return now - fetched < ttl
+
+def configure(**ttls):
+    """Overrides the TTLs of URL classes, e.g.
+    configure(player=6*HOUR, finder=FOREVER).
+
+    :ttls: Keyword arguments mapping URL classes (see TTLS) to a number of
+    seconds, FOREVER or NEXT_UPDATE.
+    :returns: None
+    """
+    unknown = set(ttls) - set(TTLS)
+    if unknown:
+        raise KeyError('unknown URL classes: {}'.format(
+            ', '.join(sorted(unknown))
+        ))
+    TTLS.update(ttls)
@@ -15,7 +15,19 @@ __all__ = [
 
 yr = datetime.datetime.now().year
 
-@sportsref.decorators.memoized
+def _abbrMatches(abbr, teamID, name):
+    """Returns True if abbr could be an abbreviation of the team with the
+    given ID and name (see BoxScore.abbreviationTeams).
+    """
+    if abbr == teamID:
+        return True
+    letters = re.sub(r'[^a-z0-9]', '', (name or '').lower())
+    if not abbr or not letters.startswith(abbr[0]):
+        return False
+    rest = iter(letters[1:])
+    return all(c in rest for c in abbr[1:])
+
+@sportsref.decorators.weakMemoized
 class BoxScore:
 
     def __init__(self, bsID):
@@ -30,12 +42,12 @@ class BoxScore:
     def __hash__(self):
         return hash(self.bsID)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def getDoc(self):
         doc = pq(sportsref.utils.getHTML(self.mainURL))
         return doc
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def date(self):
         """Returns the date of the game. See Python datetime.date documentation
         for more.
@@ -45,7 +57,7 @@ class BoxScore:
         year, month, day = map(int, match.groups())
         return datetime.date(year=year, month=month, day=day)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def weekday(self):
         """Returns the day of the week on which the game occurred.
         :returns: String representation of the day of the week for the game.
@@ -57,7 +69,7 @@ class BoxScore:
         wd = date.weekday()
         return days[wd]
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def home(self):
         """Returns home team ID.
         :returns: 3-character string representing home team's ID.
@@ -67,7 +79,7 @@ class BoxScore:
         home = sportsref.utils.relURLToID(table('tr').eq(2)('a').attr['href'])
         return home
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def away(self):
         """Returns away team ID.
         :returns: 3-character string representing away team's ID.
@@ -77,7 +89,7 @@ class BoxScore:
         away = sportsref.utils.relURLToID(table('tr').eq(1)('a').attr['href'])
         return away
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def homeScore(self):
         """Returns score of the home team.
         :returns: int of the home score.
@@ -88,7 +100,7 @@ class BoxScore:
         homeScore = table('tr').eq(2)('td')[-1].text_content()
         return int(homeScore)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def awayScore(self):
         """Returns score of the away team.
         :returns: int of the away score.
@@ -99,7 +111,7 @@ class BoxScore:
         awayScore = table('tr').eq(1)('td')[-1].text_content()
         return int(awayScore)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def winner(self):
         """Returns the team ID of the winning team. Returns NaN if a tie.
         """
@@ -112,7 +124,7 @@ class BoxScore:
         else:
             return np.nan
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def week(self):
         """Returns the week in which this game took place. 18 is WC round, 19
         is Div round, 20 is CC round, 21 is SB.
@@ -126,7 +138,7 @@ class BoxScore:
         else:
             return 21 # super bowl is week 21
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def season(self):
         """Returns the year ID of the season in which this game took place. Useful for week 17 January games.
         :returns: An int representing the year of the season.
@@ -140,7 +152,7 @@ class BoxScore:
             # super bowl happens in calendar year after the season's year
             return self.date().year - 1 
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def starters(self):
         """Returns a DataFrame where each row is an entry in the starters table
         from PFR. The columns are:
@@ -181,7 +193,7 @@ class BoxScore:
                 data.append(datum)
         return pd.DataFrame(data)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def gameInfo(self):
         """Gets a dictionary of basic information about the game. Note: line
         is given in terms of the home team (if the home team is favored, the
@@ -248,7 +260,7 @@ class BoxScore:
 
         return giDict
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def line(self):
         doc = self.getDoc()
         table = doc('table#game_info tr')
@@ -265,7 +277,7 @@ class BoxScore:
             line = 0
         return line
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def weather(self):
         """Returns a dictionary of weather-related info.
 
@@ -303,15 +315,14 @@ class BoxScore:
         d['windMPH'] = d['windMPH'] if pd.notnull(d['windMPH']) else 0
         return d
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def pbp(self):
         """Returns a dataframe of the play-by-play data from the game.
 
         :returns: pandas DataFrame of play-by-play. Similar to GPF.
         """
-        doc = self.getDoc()
-        table = doc('table#pbp_data')
-        pbp = sportsref.utils.parseTable(table)
+        pbp = sportsref.utils.getTable(self.mainURL, 'table#pbp_data',
+                                       self.getDoc)
         # make the following features conveniently available on each row
         pbp['bsID'] = self.bsID
         pbp['home'] = self.home()
@@ -320,59 +331,26 @@ class BoxScore:
         pbp['week'] = self.week()
         feats = sportsref.pfr.pbp.expandDetails(pbp)
 
-        # add team and opp columns by iterating through rows
-        df = sportsref.pfr.utils.addTeamColumns(feats)
-        # add WPA column (requires diff, can't be done row-wise)
-        df['home_wpa'] = df.home_wp.diff()
-        # lag score columns, fill in 0-0 to start
-        for col in ('home_wp', 'pbp_score_hm', 'pbp_score_aw'):
-            if col in df.columns:
-                df[col] = df[col].shift(1)
-        df.ix[0, ['pbp_score_hm', 'pbp_score_aw']] = 0
-        # fill in WP NaN's
-        df.home_wp.fillna(method='ffill', inplace=True)
-        # fix first play border after diffing/shifting for WP and WPA
-        firstPlaysOfGame = df[df.secsElapsed == 0].index
-        line = self.line()
-        for i in firstPlaysOfGame:
-            initwp = sportsref.pfr.winProb.initialWinProb(line)
-            df.ix[i, 'home_wp'] = initwp
-            df.ix[i, 'home_wpa'] = df.ix[i+1, 'home_wp'] - initwp
-        # fix last play border after diffing/shifting for WP and WPA
-        lastPlayIdx = df.iloc[-1].name
-        lastPlayWP = df.ix[lastPlayIdx, 'home_wp']
-        # if a tie, final WP is 50%; otherwise, determined by winner
-        winner = self.winner()
-        finalWP = 50. if pd.isnull(winner) else (winner == self.home()) * 100.
-        df.ix[lastPlayIdx, 'home_wpa'] = finalWP - lastPlayWP
-        # fix WPA for timeouts and plays after timeouts
-        timeouts = df[df.isTimeout].index
-        for to in timeouts:
-            df.ix[to, 'home_wpa'] = 0.
-            if to + 2 in df.index:
-                wpa = df.ix[to+2, 'home_wp'] - df.ix[to+1, 'home_wp']
-            else:
-                wpa = finalWP - df.ix[to+1, 'home_wp']
-            df.ix[to+1, 'home_wpa'] = wpa
+        boxScores = {self.bsID: self}
+        # add team and opp columns
+        df = sportsref.pfr.pbp.addTeamColumns(feats, boxScores)
+        # add WPA, lag WP and scores, and fix the game's borders
+        df = sportsref.pfr.pbp.addWPAColumns(df, boxScores)
         # add team-related features to DataFrame
-        df = df.apply(sportsref.pfr.utils.addTeamFeatures, axis=1)
-        # fill distToGoal NaN's
-        df['distToGoal'] = np.where(df.isKickoff, 65, df.distToGoal)
-        df.distToGoal.fillna(method='bfill', inplace=True)
-        df.distToGoal.fillna(method='ffill', inplace=True) # for last play of game
+        df = sportsref.pfr.pbp.addTeamFeaturesFrame(df, boxScores)
 
         return df
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def refInfo(self):
         """Gets a dictionary of ref positions and the ref IDs of the refs for
         that game.
         :returns: A dictionary of ref positions and IDs.
 
         """
-        doc = self.getDoc()
         refDict = {}
-        refTable = doc('table#ref_info')
+        refTable = sportsref.utils.getTableDoc(self.mainURL, 'table#ref_info',
+                                               self.getDoc)
         for tr in refTable('tr[class=""]').items():
             td0, td1 = tr('td').items()
             key = td0.text().lower()
@@ -381,19 +359,91 @@ class BoxScore:
             refDict[key] = val
         return refDict
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def playerStats(self):
         """Gets the stats for offense, defense, returning, and kicking of
         individual players in the game.
         :returns: A DataFrame containing individual player stats.
         """
-        doc = self.getDoc()
         tableIDs = ('skill_stats', 'def_stats', 'st_stats', 'kick_stats')
         dfs = []
         for tID in tableIDs:
-            table = doc('#{}'.format(tID))
-            dfs.append(sportsref.utils.parseTable(table))
-        df = pd.concat(dfs, ignore_index=True)
+            dfs.append(sportsref.utils.getTable(
+                self.mainURL, '#{}'.format(tID), self.getDoc
+            ))
+        df = sportsref.utils.concatTables(dfs, ignore_index=True)
         df = df.reset_index(drop=True)
-        df['team'] = df['team'].str.lower()
+        team = df['team'].str.lower()
+        if pd.api.types.is_categorical_dtype(df['team']):
+            team = team.astype('category')
+        df['team'] = team
         return df
+
+    @sportsref.decorators.memoizedMethod
+    def playerTeams(self):
+        """Gets the team each player in the game played for, using only the
+        player stats tables and starting lineups on the boxscore page (so it
+        costs no requests beyond the boxscore itself). Players whose team
+        can't be matched to the home or away team are left out.
+        :returns: Dictionary mapping player IDs to team IDs.
+        """
+        teams = {}
+        try:
+            stats = self.playerStats()
+        except KeyError:
+            # none of the stats tables are on this boxscore
+            stats = pd.DataFrame()
+        if not stats.empty:
+            # the stats tables use the team's abbreviation (e.g., 'bal'),
+            # which isn't always the team ID (e.g., 'rav')
+            stats = stats.dropna(subset=['player', 'team'])
+            abbrTeams = self.abbreviationTeams(stats.team.unique())
+            teams.update(
+                (pID, abbrTeams[abbr])
+                for pID, abbr in zip(stats.player, stats.team)
+                if abbr in abbrTeams
+            )
+        try:
+            starters = self.starters()
+        except StopIteration:
+            # no starting lineups on this boxscore
+            starters = pd.DataFrame()
+        if not starters.empty:
+            # starters are listed by home/away, so they take precedence
+            teams.update(zip(starters.playerID, starters.team))
+        return teams
+
+    def abbreviationTeams(self, abbrs):
+        """Matches team abbreviations, like those in the player stats tables,
+        to the home and away team IDs. An abbreviation matches a team if it is
+        the team's ID or if its letters appear in order in the team's name,
+        starting with the name's first letter (e.g., 'bal' and "Baltimore
+        Ravens"). An abbreviation that matches both teams is resolved by
+        elimination; one that matches neither is left out.
+        :abbrs: An iterable of lowercase team abbreviations.
+        :returns: Dictionary mapping abbreviations to team IDs.
+        """
+        table = self.getDoc()('table#linescore')
+        names = {
+            self.away(): table('tr').eq(1)('a').text(),
+            self.home(): table('tr').eq(2)('a').text(),
+        }
+        candidates = {
+            abbr: [tm for tm, name in names.iteritems()
+                   if _abbrMatches(abbr, tm, name)]
+            for abbr in abbrs
+        }
+        abbrTeams = {}
+        while True:
+            taken = set(abbrTeams.values())
+            found = {
+                abbr: left[0] for abbr, left in (
+                    (abbr, [tm for tm in tms if tm not in taken])
+                    for abbr, tms in candidates.iteritems()
+                    if abbr not in abbrTeams
+                )
+                if len(left) == 1
+            }
+            if not found:
+                return abbrTeams
+            abbrTeams.update(found)
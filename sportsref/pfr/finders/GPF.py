@@ -11,7 +11,8 @@ import sportsref
 GAME_PLAY_URL = ('http://www.pro-football-reference.com/'
                  'play-index/play_finder.cgi')
 
-CONSTANTS_FN = 'GPFConstants.json'
+CONSTANTS_FN = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                            'GPFConstants.json')
 
 def GamePlayFinder(**kwargs):
     """ Docstring will be filled in by __init__.py """
@@ -21,12 +22,8 @@ def GamePlayFinder(**kwargs):
     # if verbose, print url
     if kwargs.get('verbose', False):
         print url
-    html = sportsref.utils.getHTML(url)
-    doc = pq(html)
-    
     # parse
-    table = doc('#div_ table.stats_table')
-    plays = sportsref.utils.parseTable(table)
+    plays = sportsref.utils.getTable(url, '#div_ table.stats_table')
 
     # clean game date
     if 'game_date' in plays.columns:
@@ -150,7 +147,6 @@ def kwArgsToQS(**kwargs):
 
     return qs
 
-@sportsref.decorators.switchToDir(os.path.dirname(os.path.realpath(__file__)))
 def getInputsOptionsDefaults():
     """Handles scraping options for play finder form.
 
@@ -234,18 +230,18 @@ def getInputsOptionsDefaults():
         def_dict.pop('request', None)
         def_dict.pop('use_favorites', None)
 
-        with open(CONSTANTS_FN, 'w+') as f:
-            for k in def_dict:
-                try:
-                    def_dict[k]['value'] = sorted(
-                        list(def_dict[k]['value']), key=int
-                    )
-                    def_dict[k]['options'] = sorted(
-                        list(def_dict[k]['options']), key=int
-                    )
-                except:
-                    def_dict[k]['value'] = sorted(list(def_dict[k]['value']))
-                    def_dict[k]['options'] = sorted(list(def_dict[k]['options']))
-            json.dump(def_dict, f)
+        for k in def_dict:
+            try:
+                def_dict[k]['value'] = sorted(
+                    list(def_dict[k]['value']), key=int
+                )
+                def_dict[k]['options'] = sorted(
+                    list(def_dict[k]['options']), key=int
+                )
+            except:
+                def_dict[k]['value'] = sorted(list(def_dict[k]['value']))
+                def_dict[k]['options'] = sorted(list(def_dict[k]['options']))
+        # write atomically, since other processes may be reading the file
+        sportsref.utils.writeFileAtomic(CONSTANTS_FN, json.dumps(def_dict))
 
     return def_dict
@@ -11,7 +11,8 @@ import sportsref
 PLAYER_SEASON_URL = ('http://www.pro-football-reference.com/'
                      'play-index/psl_finder.cgi')
 
-CONSTANTS_FN = 'PSFConstants.json'
+CONSTANTS_FN = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                            'PSFConstants.json')
 
 def PlayerSeasonFinder(**kwargs):
     """ Docstring will be filled in by __init__.py """
@@ -146,7 +147,6 @@ def kwArgsToQS(**kwargs):
 
     return qs
 
-@sportsref.decorators.switchToDir(os.path.dirname(os.path.realpath(__file__)))
 def getInputsOptionsDefaults():
     """Handles scraping options for player-season finder form.
 
@@ -224,18 +224,18 @@ def getInputsOptionsDefaults():
         def_dict.pop('request', None)
         def_dict.pop('use_favorites', None)
 
-        with open(CONSTANTS_FN, 'w+') as f:
-            for k in def_dict:
-                try:
-                    def_dict[k]['value'] = sorted(
-                        list(def_dict[k]['value']), key=int
-                    )
-                    def_dict[k]['options'] = sorted(
-                        list(def_dict[k]['options']), key=int
-                    )
-                except:
-                    def_dict[k]['value'] = sorted(list(def_dict[k]['value']))
-                    def_dict[k]['options'] = sorted(list(def_dict[k]['options']))
-            json.dump(def_dict, f)
+        for k in def_dict:
+            try:
+                def_dict[k]['value'] = sorted(
+                    list(def_dict[k]['value']), key=int
+                )
+                def_dict[k]['options'] = sorted(
+                    list(def_dict[k]['options']), key=int
+                )
+            except:
+                def_dict[k]['value'] = sorted(list(def_dict[k]['value']))
+                def_dict[k]['options'] = sorted(list(def_dict[k]['options']))
+        # write atomically, since other processes may be reading the file
+        sportsref.utils.writeFileAtomic(CONSTANTS_FN, json.dumps(def_dict))
     
     return def_dict
@@ -1,4 +1,3 @@
-import copy
 import re
 import sys
 
@@ -25,18 +24,18 @@ def expandDetails(df, detailCol='detail'):
     :detailCol: The detail column name.
     :returns: Returns DataFrame with new columns from pbp parsing.
     """
-    df = copy.deepcopy(df)
+    df = df.copy()
     df['detail'] = df[detailCol]
-    dicts = map(sportsref.pfr.pbp.parsePlayDetails, df['detail'])
-    # clean up unmatched details
-    cols = {c for d in dicts if d for c in d.iterkeys()}
-    blankEntry = {c: np.nan for c in cols}
-    newDicts = [d if d else blankEntry for i, d in enumerate(dicts)]
-    # get details DataFrame and merge it with original to create main DataFrame
-    details = pd.DataFrame(newDicts)
-    df = pd.merge(df, details, left_index=True, right_index=True)
+    details, parsed = parsePlayDetailsFrame(df['detail'])
+    # join the details to the original to create main DataFrame; a plain
+    # concat suffices when the rows line up and no column names clash
+    if (df.index.equals(details.index) and
+            not df.columns.intersection(details.columns).size):
+        df = pd.concat((df, details), axis=1)
+    else:
+        df = pd.merge(df, details, left_index=True, right_index=True)
     # add isError column
-    errors = [i for i, d in enumerate(dicts) if d is None]
+    errors = np.flatnonzero(~parsed)
     df['isError'] = False
     df.loc[errors, 'isError'] = True
     # fill in some NaN's necessary for cleanFeatures
@@ -46,23 +45,14 @@ def expandDetails(df, detailCol='detail'):
         pd.Series(np.where(df.quarter == 4, '0:00', '15:00')),
         inplace=True
     )
-    # use cleanFeatures to clean up and add columns
-    new_df = df.apply(cleanFeatures, axis=1)
-    return new_df
+    # use cleanFeaturesFrame to clean up and add columns
+    return cleanFeaturesFrame(df)
 
-@sportsref.decorators.memoized
-def parsePlayDetails(details):
-    """Parses play details from play-by-play string and returns structured
-    data.
+def _compileGrammar():
+    """Builds the regexes used by parsePlayDetails. Called once, at import.
 
-    :details: detail string for play
-    :returns: dictionary of play attributes
+    :returns: A (challengeRE, grammar) tuple; see PLAY_GRAMMAR.
     """
-
-    # if input isn't a string, return None
-    if not isinstance(details, basestring):
-        return None
-
     rushOptRE = r'(?P<rushDir>{})'.format(
         r'|'.join(RUSH_OPTS.iterkeys())
     )
@@ -72,31 +62,11 @@ def parsePlayDetails(details):
 
     playerRE = r"\S{6,8}\d{2}"
 
-
-    # initialize return dictionary - struct
-    struct = {}
-
-    # handle challenges
-    # TODO: record the play both before & after an overturned challenge
     challengeRE = re.compile(
         r'.+\. (?P<challenger>.+?) challenged.*? the play was '
         '(?P<callUpheld>upheld|overturned)\.',
         re.IGNORECASE
     )
-    match = challengeRE.search(details)
-    if match:
-        struct['isChallenge'] = True
-        struct.update(match.groupdict())
-        # if overturned, only record updated play
-        if 'overturned' in details:
-            overturnedIdx = details.index('overturned.')
-            newStart = overturnedIdx + len('overturned.')
-            details = details[newStart:].strip()
-    else:
-        struct['isChallenge'] = False
-
-    # TODO: expand on laterals
-    struct['isLateral'] = details.find('lateral') != -1
 
     # create rushing regex
     rusherRE = r"(?P<rusher>{0})".format(playerRE)
@@ -259,102 +229,233 @@ def parsePlayDetails(details):
         r'.*?(?: \(no play\)))')
     psPenaltyRE = re.compile(psPenaltyREstr, re.IGNORECASE)
 
-    # try parsing as a kickoff
-    match = kickoffRE.search(details)
-    if match:
-        # parse as a kickoff
-        struct['isKickoff'] = True
-        struct.update(match.groupdict())
-        return struct
+    return challengeRE, [
+        ('isKickoff', (' kicks ',), kickoffRE),
+        ('isTimeout', ('timeout #',), timeoutRE),
+        ('isFieldGoal', (' yard field goal ',), fgRE),
+        ('isPunt', (' punts',), puntRE),
+        ('isKneel', (' kneels for ',), kneelRE),
+        ('isSpike', (' spiked the ball',), spikeRE),
+        ('isXP', ('extra point ',), extraPointRE),
+        ('isTwoPoint', ('two point attempt: ',), twoPointRE),
+        ('isPass', ('sacked ', 'pass '), passRE),
+        ('isRun', (), rushRE),
+        ('isPresnapPenalty', ('penalty on ',), psPenaltyRE),
+    ]
 
-    # try parsing as a timeout
-    match = timeoutRE.search(details)
-    if match:
-        # parse as timeout
-        struct['isTimeout'] = True
-        struct.update(match.groupdict())
-        return struct
+# the play types that parsePlayDetails tries, in order, as (flag, keywords,
+# regex) tuples. A regex can only match a string containing (case
+# insensitively) one of its keywords, so the others are skipped without
+# running the regex; an empty tuple means the regex is always tried.
+CHALLENGE_RE, PLAY_GRAMMAR = _compileGrammar()
 
-    # try parsing as a field goal
-    match = fgRE.search(details)
-    if match:
-        # parse as a field goal
-        struct['isFieldGoal'] = True
-        struct.update(match.groupdict())
-        x = struct.get('fgBlocker')
-        return struct
+@sportsref.decorators.memoized
+def parsePlayDetails(details):
+    """Parses play details from play-by-play string and returns structured
+    data.
 
-    # try parsing as a punt
-    match = puntRE.search(details)
-    if match:
-        # parse as a punt
-        struct['isPunt'] = True
-        struct.update(match.groupdict())
-        return struct
+    :details: detail string for play
+    :returns: dictionary of play attributes
+    """
 
-    # try parsing as a kneel
-    match = kneelRE.search(details)
-    if match:
-        # parse as a kneel
-        struct['isKneel'] = True
-        struct.update(match.groupdict())
-        return struct
+    # if input isn't a string, return None
+    if not isinstance(details, basestring):
+        return None
 
-    # try parsing as a spike
-    match = spikeRE.search(details)
-    if match:
-        # parse as a spike
-        struct['isSpike'] = True
-        struct.update(match.groupdict())
-        return struct
+    # initialize return dictionary - struct
+    struct = {}
 
-    # try parsing as an XP
-    match = extraPointRE.search(details)
+    # handle challenges
+    # TODO: record the play both before & after an overturned challenge
+    match = CHALLENGE_RE.search(details)
     if match:
-        # parse as an XP
-        struct['isXP'] = True
+        struct['isChallenge'] = True
         struct.update(match.groupdict())
-        return struct
+        # if overturned, only record updated play
+        if 'overturned' in details:
+            overturnedIdx = details.index('overturned.')
+            newStart = overturnedIdx + len('overturned.')
+            details = details[newStart:].strip()
+    else:
+        struct['isChallenge'] = False
 
-    # try parsing as a 2-point conversion
-    match = twoPointRE.search(details)
-    if match:
-        # parse as a 2-point conversion
-        struct['isTwoPoint'] = True
-        struct['twoPointSuccess'] = match.group('twoPointSuccess')
-        realPlay = sportsref.pfr.pbp.parsePlayDetails(match.group('twoPoint'))
-        if realPlay:
-            struct.update(realPlay)
-        return struct
+    # TODO: expand on laterals
+    struct['isLateral'] = details.find('lateral') != -1
 
-    # try parsing as a pass
-    match = passRE.search(details)
-    if match:
-        # parse as a pass
-        struct['isPass'] = True
-        struct.update(match.groupdict())
+    # try each type of play in order, skipping those whose keywords are
+    # missing from the string
+    lowered = details.lower()
+    for flag, keywords, regex in PLAY_GRAMMAR:
+        if keywords and not any(kw in lowered for kw in keywords):
+            continue
+        match = regex.search(details)
+        if not match:
+            continue
+        struct[flag] = True
+        if flag == 'isTwoPoint':
+            # parse the play that was run for the conversion
+            struct['twoPointSuccess'] = match.group('twoPointSuccess')
+            realPlay = sportsref.pfr.pbp.parsePlayDetails(
+                match.group('twoPoint')
+            )
+            if realPlay:
+                struct.update(realPlay)
+        else:
+            struct.update(match.groupdict())
         return struct
 
-    # try parsing as a run
-    match = rushRE.search(details)
-    if match:
-        # parse as a run
-        struct['isRun'] = True
-        struct.update(match.groupdict())
-        return struct
+    return None
 
-    # try parsing as a pre-snap penalty
-    match = psPenaltyRE.search(details)
-    if match:
-        # parse as a pre-snap penalty
-        struct['isPresnapPenalty'] = True
-        struct.update(match.groupdict())
-        return struct
+def parseAllPlayDetails(details):
+    """Bulk version of parsePlayDetails: parses each distinct detail string
+    only once.
 
+    :details: An iterable (e.g., a Series) of detail strings.
+    :returns: A list with the dict (or None) for each detail string.
+    """
+    parsed = {}
+    ret = []
+    for d in details:
+        try:
+            ret.append(parsed[d])
+        except KeyError:
+            ret.append(parsed.setdefault(d, parsePlayDetails(d)))
+        except TypeError:
+            ret.append(parsePlayDetails(d))
+    return ret
 
-    return None
+def parsePlayDetailsFrame(details):
+    """Column-wise version of parseAllPlayDetails: finds the type of each
+    play with the keywords and regexes of PLAY_GRAMMAR, then runs each play
+    type's regex over just its plays with Series.str.extract.
+
+    :details: A Series of detail strings.
+    :returns: A (DataFrame, parsed) tuple. The DataFrame has a row for each
+    detail string (with a fresh RangeIndex) and a column for each attribute
+    found, the same as a DataFrame built from the dicts returned by
+    parsePlayDetails, with all-NaN rows where those were None; `parsed` is a
+    boolean array that is False for those rows.
+    """
+    details = pd.Series(details.values, dtype=object)
+    n = len(details)
+    isStr = details.map(lambda d: isinstance(d, basestring))
+    strs = details[isStr.values.astype(bool)]
+
+    # attribute -> object array of values, and which rows have it (i.e.,
+    # whose dict would have it as a key); rows a play type's regex matched
+    # get None for its groups that didn't participate, like groupdict()
+    cols = {}
+    hasCol = {}
+    def setCol(col, idx, vals):
+        if not np.size(idx):
+            return
+        if col not in cols:
+            cols[col] = np.full(n, np.nan, dtype=object)
+            hasCol[col] = np.zeros(n, dtype=bool)
+        cols[col][idx] = vals
+        hasCol[col][idx] = True
+
+    # handle challenges
+    challenges = strs.str.extract(CHALLENGE_RE, expand=True)
+    isChallenge = challenges.notnull().any(axis=1)
+    challenges = challenges[isChallenge]
+    for col in challenges.columns:
+        setCol(col, challenges.index.values, challenges[col].values)
+    # if overturned, only record updated play
+    overturned = [i for i in challenges.index if 'overturned' in strs[i]]
+    if overturned:
+        strs = strs.copy()
+        for i in overturned:
+            d = strs[i]
+            newStart = d.index('overturned.') + len('overturned.')
+            strs[i] = d[newStart:].strip()
+
+    setCol('isChallenge', strs.index.values, isChallenge.values)
+    setCol('isLateral', strs.index.values,
+           strs.str.contains('lateral', regex=False).values)
+
+    # try each type of play in order on the plays that haven't matched yet
+    parsed = np.zeros(n, dtype=bool)
+    remaining = strs
+    lowered = strs.str.lower()
+    for flag, keywords, regex in PLAY_GRAMMAR:
+        if remaining.empty:
+            break
+        candidates = remaining
+        if keywords:
+            hasKeyword = np.zeros(len(remaining), dtype=bool)
+            for kw in keywords:
+                hasKeyword |= lowered[remaining.index].str.contains(
+                    kw, regex=False
+                ).values
+            candidates = remaining[hasKeyword]
+        if candidates.empty:
+            continue
+        block = candidates.str.extract(regex, expand=True)
+        # every play type has a group that always participates in a match
+        block = block[block.notnull().any(axis=1)]
+        if block.empty:
+            continue
+        idx = block.index.values
+        parsed[idx] = True
+        remaining = remaining.drop(block.index)
+        if flag == 'isTwoPoint':
+            # the play run for the conversion is parsed on its own; rare
+            # enough to do one play at a time
+            for i in idx:
+                for col, val in parsePlayDetails(details[i]).iteritems():
+                    setCol(col, i, val)
+            continue
+        setCol(flag, idx, True)
+        for col in block.columns:
+            vals = block[col].values
+            setCol(col, idx, np.where(pd.isnull(vals), None, vals))
+
+    # rows that didn't parse are blank, even their challenge/lateral columns
+    for col, vals in cols.items():
+        if not (hasCol[col] & parsed).any():
+            del cols[col]
+        else:
+            vals[~parsed] = np.nan
+    frame = pd.DataFrame(cols, index=pd.RangeIndex(n),
+                         columns=sorted(cols)).infer_objects()
+    return frame, parsed
+
+# flags set by parsePlayDetails for each type of play
+PLAY_TYPES = [
+    'isKickoff', 'isTimeout', 'isFieldGoal', 'isPunt', 'isKneel', 'isSpike',
+    'isXP', 'isTwoPoint', 'isPresnapPenalty', 'isPass', 'isRun'
+]
+# the types that cleanFeatures gives to the play features
+BOOL_VARS = [
+    'fgGood', 'isBlocked', 'isChallenge', 'isComplete', 'isFairCatch',
+    'isFieldGoal', 'isKickoff', 'isKneel', 'isLateral', 'isNoPlay',
+    'isPass', 'isPresnapPenalty', 'isPunt', 'isRun', 'isSack', 'isSafety',
+    'isSpike', 'isTD', 'isTimeout', 'isTouchback', 'isTwoPoint', 'isXP',
+    'isMuffedCatch', 'oob', 'penDeclined', 'twoPointSuccess', 'xpGood'
+]
+INT_VARS = [
+    'down', 'fgBlockRetYds', 'fgDist', 'fumbRecYdLine', 'fumbRetYds',
+    'intRetYds', 'intYdLine', 'koRetYds', 'koYds', 'muffRetYds',
+    'pbp_score_aw', 'pbp_score_hm', 'passYds', 'penYds', 'puntBlockRetYds',
+    'puntRetYds', 'puntYds', 'quarter', 'rushYds', 'sackYds', 'timeoutNum',
+    'ydLine', 'yds_to_go'
+]
+FLOAT_VARS = [
+    'exp_pts_after', 'exp_pts_before', 'home_wp'
+]
+STRING_VARS = [
+    'challenger', 'detail', 'fairCatcher', 'fgBlockRecoverer',
+    'fgBlocker', 'fgKicker', 'fieldSide', 'fumbForcer',
+    'fumbRecFieldSide', 'fumbRecoverer', 'fumbler', 'intFieldSide',
+    'interceptor', 'kneelQB', 'koKicker', 'koReturner', 'muffRecoverer',
+    'muffedBy', 'passLoc', 'passer', 'penOn', 'penalty',
+    'puntBlockRecoverer', 'puntBlocker', 'puntReturner', 'punter',
+    'qtr_time_remain', 'rushDir', 'rusher', 'sacker1', 'sacker2',
+    'spikeQB', 'tackler1', 'tackler2', 'target', 'timeoutTeam',
+    'xpKicker'
+]
 
-@sportsref.decorators.memoized
 def cleanFeatures(struct):
     """Cleans up the features collected in parsePlayDetails.
 
@@ -364,10 +465,7 @@ def cleanFeatures(struct):
     """
     struct = dict(struct)
     # First, clean up play type bools
-    ptypes = ['isKickoff', 'isTimeout', 'isFieldGoal', 'isPunt', 'isKneel',
-              'isSpike', 'isXP', 'isTwoPoint', 'isPresnapPenalty', 'isPass',
-              'isRun']
-    for pt in ptypes:
+    for pt in PLAY_TYPES:
         struct[pt] = struct[pt] if pd.notnull(struct.get(pt)) else False
     # Second, clean up other existing variables on a one-off basis
     struct['callUpheld'] = struct.get('callUpheld') == 'upheld'
@@ -406,47 +504,19 @@ def cleanFeatures(struct):
     struct['xpGood'] = struct.get('xpGood') == 'good'
 
     # Third, ensure types are correct
-    bool_vars = [
-        'fgGood', 'isBlocked', 'isChallenge', 'isComplete', 'isFairCatch',
-        'isFieldGoal', 'isKickoff', 'isKneel', 'isLateral', 'isNoPlay',
-        'isPass', 'isPresnapPenalty', 'isPunt', 'isRun', 'isSack', 'isSafety',
-        'isSpike', 'isTD', 'isTimeout', 'isTouchback', 'isTwoPoint', 'isXP',
-        'isMuffedCatch', 'oob', 'penDeclined', 'twoPointSuccess', 'xpGood'
-    ]
-    int_vars = [
-        'down', 'fgBlockRetYds', 'fgDist', 'fumbRecYdLine', 'fumbRetYds',
-        'intRetYds', 'intYdLine', 'koRetYds', 'koYds', 'muffRetYds',
-        'pbp_score_aw', 'pbp_score_hm', 'passYds', 'penYds', 'puntBlockRetYds',
-        'puntRetYds', 'puntYds', 'quarter', 'rushYds', 'sackYds', 'timeoutNum',
-        'ydLine', 'yds_to_go'
-    ]
-    float_vars = [
-        'exp_pts_after', 'exp_pts_before', 'home_wp'
-    ]
-    string_vars = [
-        'challenger', 'detail', 'fairCatcher', 'fgBlockRecoverer',
-        'fgBlocker', 'fgKicker', 'fieldSide', 'fumbForcer',
-        'fumbRecFieldSide', 'fumbRecoverer', 'fumbler', 'intFieldSide',
-        'interceptor', 'kneelQB', 'koKicker', 'koReturner', 'muffRecoverer',
-        'muffedBy', 'passLoc', 'passer', 'penOn', 'penalty',
-        'puntBlockRecoverer', 'puntBlocker', 'puntReturner', 'punter',
-        'qtr_time_remain', 'rushDir', 'rusher', 'sacker1', 'sacker2',
-        'spikeQB', 'tackler1', 'tackler2', 'target', 'timeoutTeam',
-        'xpKicker'
-    ]
-    for var in bool_vars:
+    for var in BOOL_VARS:
         struct[var] = struct.get(var) == True
-    for var in int_vars:
+    for var in INT_VARS:
         try:
             struct[var] = int(struct.get(var))
         except (ValueError, TypeError) as e:
             struct[var] = np.nan
-    for var in float_vars:
+    for var in FLOAT_VARS:
         try:
             struct[var] = float(struct.get(var))
         except (ValueError, TypeError) as e:
             struct[var] = np.nan
-    for var in string_vars:
+    for var in STRING_VARS:
         if var not in struct or pd.isnull(struct[var]) or var == '':
             struct[var] = np.nan
 
@@ -473,6 +543,172 @@ def cleanFeatures(struct):
     struct['opp_epa'] = struct['exp_pts_before'] - struct['exp_pts_after']
     return pd.Series(struct)
 
+def _equals(col, value):
+    """Elementwise `col == value` for a string `value`, as a bool array."""
+    if col.dtype.kind in 'biuf':
+        # numbers never equal strings
+        return np.zeros(len(col), dtype=bool)
+    return np.asarray(col == value, dtype=bool)
+
+def _toInt(col):
+    """int() of each value of a column, with NaN where int() fails. Returns
+    int64 if nothing failed, float64 otherwise.
+    """
+    if col.dtype.kind in 'biuf':
+        vals = np.trunc(col.values.astype(float))
+    else:
+        vals = col.map(_intOrNaN).values.astype(float)
+    return vals if np.isnan(vals).any() else vals.astype(np.int64)
+
+def _intOrNaN(v):
+    try:
+        return int(v)
+    except (ValueError, TypeError):
+        return np.nan
+
+def _toFloat(col):
+    """float() of each value of a column, with NaN where float() fails."""
+    if col.dtype.kind in 'biuf':
+        return col.values.astype(float)
+    return col.map(_floatOrNaN).values.astype(float)
+
+def _floatOrNaN(v):
+    try:
+        return float(v)
+    except (ValueError, TypeError):
+        return np.nan
+
+# dtypes that survive a trip through the object rows of df.apply(axis=1)
+_APPLY_DTYPES = (np.dtype(np.int64), np.dtype(np.float64), np.dtype(bool),
+                 np.dtype(object))
+
+def cleanFeaturesFrame(df):
+    """Column-wise version of cleanFeatures: cleans up the features of all
+    plays at once. The result is the same as df.apply(cleanFeatures,
+    axis=1).
+
+    :df: DataFrame of features parsed from details strings, one row per
+    play.
+    :returns: A new DataFrame with cleaner features.
+    """
+    n = len(df)
+    blank = pd.Series(np.full(n, np.nan, dtype=object), index=df.index)
+    get = lambda c: df[c] if c in df.columns else blank
+    detail = get('detail')
+    isStr = detail.map(lambda d: isinstance(d, basestring)).values.astype(bool)
+    detailStrs = detail.where(isStr, '').astype(object)
+
+    # columns cleanFeatures doesn't touch keep their values; those that don't
+    # have a dtype of their own are re-inferred like apply would
+    out = {}
+    for c in df.columns:
+        col = df[c]
+        out[c] = col if col.dtype in _APPLY_DTYPES else col.astype(object)
+
+    # First, clean up play type bools; Second, clean up other existing
+    # variables on a one-off basis
+    out['callUpheld'] = _equals(get('callUpheld'), 'upheld')
+    out['fgGood'] = _equals(get('fgGood'), 'good')
+    out['isBlocked'] = _equals(get('isBlocked'), 'blocked')
+    out['isComplete'] = _equals(get('isComplete'), 'complete')
+    out['isFairCatch'] = _equals(get('isFairCatch'), 'fair catch')
+    out['isMuffedCatch'] = get('isMuffedCatch').notnull().values
+    out['isNoPlay'] = isStr & (
+        detailStrs.str.contains(' (no play)', regex=False).values &
+        ~detailStrs.str.contains('penalty enforced in end zone',
+                                 regex=False).values
+    )
+    out['isOnside'] = _equals(get('isOnside'), 'onside')
+    out['isSack'] = get('sackYds').notnull().values
+    out['isSafety'] = _equals(get('isSafety'), ', safety') | (
+        detailStrs.str.contains('enforced in end zone, safety',
+                                regex=False).values
+    )
+    out['isTD'] = _equals(get('isTD'), ', touchdown')
+    out['isTouchback'] = _equals(get('isTouchback'), ', touchback')
+    out['oob'] = get('oob').notnull().values
+    out['passLoc'] = get('passLoc').map(PASS_OPTS)
+    isPass = (get('isPass') == True).values
+    out['passYds'] = get('passYds').where(
+        ~isPass | get('passYds').notnull(), 0
+    )
+    penalty = get('penalty')
+    if penalty.notnull().any():
+        penalty = penalty.where(penalty.isnull(), penalty.str.strip())
+    out['penalty'] = penalty
+    out['penDeclined'] = _equals(get('penDeclined'), 'Declined')
+    quarter = get('quarter')
+    if quarter.dtype == object:
+        quarter = quarter.where(quarter != 'OT', 5)
+    out['quarter'] = quarter
+    out['rushDir'] = get('rushDir').map(RUSH_OPTS)
+    isRun = (get('isRun') == True).values
+    out['rushYds'] = get('rushYds').where(
+        ~isRun | get('rushYds').notnull(), 0
+    )
+    timeoutTeam = get('timeoutTeam')
+    if timeoutTeam.notnull().any():
+        timeoutTeam = timeoutTeam.map(sportsref.pfr.teams.teamIDs())
+    out['timeoutTeam'] = timeoutTeam
+    out['twoPointSuccess'] = _equals(get('twoPointSuccess'), 'succeeds')
+    out['xpGood'] = _equals(get('xpGood'), 'good')
+
+    # Third, ensure types are correct
+    getOut = lambda c: out[c] if c in out else blank
+    for var in BOOL_VARS:
+        col = getOut(var)
+        out[var] = (col == True) if isinstance(col, pd.Series) else col
+    for var in INT_VARS:
+        out[var] = _toInt(pd.Series(getOut(var), index=df.index))
+    for var in FLOAT_VARS:
+        out[var] = _toFloat(pd.Series(getOut(var), index=df.index))
+    for var in STRING_VARS:
+        col = pd.Series(getOut(var), index=df.index)
+        out[var] = col.where(col.notnull(), np.nan).astype(object)
+
+    # Fourth, create new helper variables based on parsed variables
+    # creating fieldSide and ydline from location
+    location = get('location')
+    hasLoc = (location.map(lambda l: isinstance(l, basestring) and bool(l))
+              .values.astype(bool) & ~np.asarray(out['isXP'], dtype=bool))
+    locs = location[hasLoc].str.strip()
+    hasSide = locs.str.contains(' ', regex=False)
+    sides = locs[hasSide].str.split()
+    fieldSide = np.full(n, np.nan, dtype=object)
+    ydLine = np.full(n, np.nan)
+    locIdx = np.flatnonzero(hasLoc)
+    fieldSide[locIdx[hasSide.values]] = sides.str[0].str.lower().values
+    ydLine[locIdx[hasSide.values]] = sides.str[1].astype(int).values
+    ydLine[locIdx[~hasSide.values]] = locs[~hasSide].astype(int).values
+    out['fieldSide'] = fieldSide
+    out['ydLine'] = (ydLine if np.isnan(ydLine).any()
+                     else ydLine.astype(np.int64))
+    # creating secsElapsed (in entire game) from qtr_time_remain and quarter
+    qtrTime = out['qtr_time_remain']
+    hasTime = qtrTime.notnull().values
+    if hasTime.any():
+        secsElapsed = (get('secsElapsed').values.astype(object)
+                       if 'secsElapsed' in df.columns
+                       else np.full(n, np.nan, dtype=object))
+        minsSecs = qtrTime[hasTime].str.split(':', expand=True).astype(int)
+        qtr = np.asarray(out['quarter'], dtype=float)[hasTime]
+        secs = (qtr*900 - minsSecs[0].values*60 - minsSecs[1].values)
+        secsElapsed[hasTime] = [int(x) if x == x else x for x in secs]
+        out['secsElapsed'] = secsElapsed
+    # creating columns for turnovers
+    out['isInt'] = out['interceptor'].notnull().values
+    out['isFumble'] = out['fumbler'].notnull().values
+    # create column for isPenalty
+    out['isPenalty'] = out['penalty'].notnull().values
+    # create columns for EPA
+    out['team_epa'] = out['exp_pts_after'] - out['exp_pts_before']
+    out['opp_epa'] = out['exp_pts_before'] - out['exp_pts_after']
+
+    return pd.DataFrame(
+        {c: np.asarray(v) for c, v in out.iteritems()},
+        index=df.index, columns=sorted(out)
+    ).infer_objects()
+
 @sportsref.decorators.memoized
 def locToFeatures(l):
     """Converts a location string "{Half}, {YardLine}" into a tuple of those
@@ -495,38 +731,84 @@ def locToFeatures(l):
         r = (np.nan, np.nan)
     return r
 
-def addTeamColumns(features):
-    """Function that adds 'team' and 'opp' columns to the features by iterating
-    through the rows in order. A precondition is that the features dicts are in
-    order in a continuous game sense and that all rows are from the same game.
+def addTeamColumns(features, boxScores=None):
+    """Function that adds 'team' and 'opp' columns to the features. The rows of
+    each game (by bsID) must be in order in a continuous game sense; the
+    features can hold several games one after the other.
+
+    Possession is resolved from the player making the play once per segment
+    of a game (a segment starts at each kickoff and at the play after it);
+    within a segment, the team with the ball flips on every play with the
+    pos_change class, which is just the parity of a cumulative sum.
 
     :features: A DataFrame with each row representing each play (in order).
+    :boxScores: A dict of the games' BoxScore objects (see boxScoresFor);
+    built from the plays if not given. Holding on to it keeps teamAndOpp
+    from rebuilding a game's BoxScore on every lookup.
     :returns: A similar DataFrame but with 'team' and 'opp' columns added.
     """
-    features = features.to_dict('records')
-    curTm = curOpp = None
-    playAfterKickoff = False
-    # fill in team and opp columns
-    for row in features:
-        # if it's a kickoff or the play after a kickoff,
-        # figure out who has possession manually
-        if row['isKickoff'] or playAfterKickoff:
-            curTm, curOpp = teamAndOpp(row)
+    features = features.reset_index(drop=True)
+    if boxScores is None:
+        boxScores = boxScoresFor(features['bsID'])
+    n = len(features)
+    isKickoff = (features['isKickoff'] == True).values
+    if 'hasClass_pos_change' in features.columns:
+        posChange = (features['hasClass_pos_change'] == True).values
+    else:
+        posChange = np.zeros(n, dtype=bool)
+    bsIDs = features['bsID'].values
+    # possession is figured out manually at the start of each game, at
+    # kickoffs and at the play after a kickoff
+    reset = isKickoff.copy()
+    reset[:1] = True
+    reset[1:] |= (bsIDs[1:] != bsIDs[:-1]) | isKickoff[:-1]
+
+    # find each segment's anchor: the first play whose team can be resolved
+    anchor = np.full(n, -1, dtype=np.int64)
+    anchorTm = np.full(n, np.nan, dtype=object)
+    anchorOpp = np.full(n, np.nan, dtype=object)
+    starts = np.flatnonzero(reset)
+    ends = np.r_[starts[1:], n]
+    fields = {f: features[f].values for f in TEAM_AND_OPP_FIELDS
+              if f in features.columns}
+    for start, end in zip(starts, ends):
+        for i in xrange(start, end):
+            tm, opp = teamAndOpp({f: v[i] for f, v in fields.iteritems()})
+            if pd.notnull(tm):
+                anchor[i:end] = i
+                anchorTm[i:end] = tm
+                anchorOpp[i:end] = opp
+                break
+
+    # flip possession on each pos_change after the segment's anchor
+    numChanges = np.cumsum(posChange)
+    flip = (anchor >= 0) & ((numChanges - numChanges[anchor]) % 2 == 1)
+    team = np.where(flip, anchorOpp, anchorTm)
+    opp = np.where(flip, anchorTm, anchorOpp)
+
+    # bfill plays before the first anchor, ffill for the last rows
+    features['team'] = team
+    features['opp'] = opp
+    oneGame = n == 0 or (bsIDs == bsIDs[0]).all()
+    for col in ('team', 'opp'):
+        if oneGame:
+            filled = features[col].fillna(method='bfill').fillna(method='ffill')
         else:
-            curTm, curOpp = teamAndOpp(row, curTm, curOpp)
-        row['team'], row['opp'] = curTm, curOpp
-        # set playAfterKickoff
-        playAfterKickoff = row['isKickoff']
-
-    features = pd.DataFrame(features)
-    features.team.fillna(method='bfill', inplace=True)
-    features.opp.fillna(method='bfill', inplace=True)
-    # ffill for last row
-    features.team.fillna(method='ffill', inplace=True)
-    features.opp.fillna(method='ffill', inplace=True)
-    return features
+            filled = features[col].groupby(bsIDs, sort=False).bfill()
+            filled = filled.groupby(bsIDs, sort=False).ffill()
+        features[col] = filled.infer_objects()
+    return features[sorted(features.columns)]
 
-@sportsref.decorators.memoized
+# the only fields of a play that teamAndOpp reads
+TEAM_AND_OPP_FIELDS = (
+    'bsID', 'hasClass_pos_change', 'isRun', 'rusher', 'isPass', 'passer',
+    'isFieldGoal', 'fgKicker', 'isPunt', 'punter', 'isXP', 'xpKicker',
+    'isKickoff', 'koKicker', 'isSpike', 'spikeQB', 'isKneel', 'kneelQB',
+)
+
+@sportsref.decorators.memoized(
+    key=sportsref.decorators.fieldsKey(TEAM_AND_OPP_FIELDS)
+)
 def teamAndOpp(struct, curTm=None, curOpp=None):
     """Given a dict representing a play and the current team with the ball,
     returns (team, opp) where team is the team with the ball and opp is the
@@ -566,13 +848,20 @@ def teamAndOpp(struct, curTm=None, curOpp=None):
             curTm = pID
             curOpp = bs.away() if bs.home() == curTm else bs.home()
         elif pID:
-            player = sportsref.pfr.players.Player(pID)
-            glog = player.gamelog(kind='B')
-            if 'bsID' in glog.columns:
-                narrowed = glog.loc[glog.bsID == struct['bsID'], 'team']
-                if not narrowed.empty:
-                    curTm = narrowed.item()
-                    curOpp = bs.home() if bs.home() != curTm else bs.away()
+            # look the player up in the boxscore's own tables first; only
+            # fall back to the player's gamelog if they're not there
+            curTm = bs.playerTeams().get(pID, np.nan)
+            if pd.isnull(curTm):
+                player = sportsref.pfr.players.Player(pID)
+                glog = player.gamelog(kind='B')
+                if 'bsID' in glog.columns:
+                    narrowed = glog.loc[glog.bsID == struct['bsID'], 'team']
+                    if not narrowed.empty:
+                        curTm = narrowed.item()
+            if curTm not in (bs.home(), bs.away()):
+                curTm = np.nan
+            if pd.notnull(curTm):
+                curOpp = bs.home() if bs.home() != curTm else bs.away()
 
         return curTm, curOpp
 
@@ -615,3 +904,152 @@ def addTeamFeatures(row):
         row['team_score'] = row['pbp_score_aw']
         row['opp_score'] = row['pbp_score_hm']
     return row
+
+def boxScoresFor(bsIDs):
+    """Builds the BoxScore of each game in a frame of plays. BoxScore only
+    keeps weak references to its instances, so holding on to the returned
+    dict while working on the frame makes every BoxScore(bsID) return the
+    same instance, along with its memoized document and tables.
+
+    :bsIDs: An iterable of boxscore IDs, e.g. the 'bsID' column.
+    :returns: A dict mapping each boxscore ID to its BoxScore object.
+    """
+    return {bsID: sportsref.pfr.boxscores.BoxScore(bsID)
+            for bsID in pd.unique(bsIDs)}
+
+def _gameValues(bsIDs, func, boxScores):
+    """Evaluates a function of a game's BoxScore once per game and spreads the
+    results over that game's plays.
+
+    :bsIDs: A Series with the boxscore ID of each play.
+    :func: A function that takes a BoxScore object.
+    :boxScores: A dict of BoxScore objects, as returned by boxScoresFor.
+    :returns: A numpy array with the value for each play's game.
+    """
+    values = {bsID: func(boxScores[bsID]) for bsID in bsIDs.unique()}
+    return bsIDs.map(values).values
+
+def _finalWP(bs):
+    # if a tie, final WP is 50%; otherwise, determined by winner
+    winner = bs.winner()
+    return 50. if pd.isnull(winner) else (winner == bs.home()) * 100.
+
+def addWPAColumns(df, boxScores=None):
+    """Adds a 'home_wpa' column and lags the 'home_wp' and score columns so
+    that they hold the values from before each play. The first and last plays
+    of each game are fixed using the opening line and the final result, and
+    timeouts get no WPA. The rows of each game (by bsID) must be in order; the
+    DataFrame can hold several games one after the other.
+
+    :df: A DataFrame of plays, as returned by addTeamColumns.
+    :boxScores: A dict of the games' BoxScore objects (see boxScoresFor);
+    built from the plays if not given.
+    :returns: A similar DataFrame with the new and lagged columns.
+    """
+    df = df.copy()
+    if boxScores is None:
+        boxScores = boxScoresFor(df['bsID'])
+    bsIDs = df['bsID'].values
+    n = len(df)
+    firstOfGame = np.ones(n, dtype=bool)
+    firstOfGame[1:] = bsIDs[1:] != bsIDs[:-1]
+    lastOfGame = np.ones(n, dtype=bool)
+    lastOfGame[:-1] = firstOfGame[1:]
+    byGame = lambda col: df[col].groupby(bsIDs, sort=False)
+
+    # add WPA column (requires diff, can't be done row-wise)
+    df['home_wpa'] = byGame('home_wp').diff()
+    # lag score columns, fill in 0-0 to start
+    for col in ('home_wp', 'pbp_score_hm', 'pbp_score_aw'):
+        if col in df.columns:
+            df[col] = byGame(col).shift(1)
+    for col in ('pbp_score_hm', 'pbp_score_aw'):
+        if col in df.columns:
+            df.loc[firstOfGame, col] = 0
+    # fill in WP NaN's
+    df['home_wp'] = byGame('home_wp').ffill()
+
+    # fix first play border after diffing/shifting for WP and WPA
+    isFirstPlay = (df['secsElapsed'] == 0).values
+    if isFirstPlay.any():
+        initWP = _gameValues(
+            df['bsID'][isFirstPlay],
+            lambda bs: sportsref.pfr.winProb.initialWinProb(bs.line()),
+            boxScores
+        )
+        nextWP = byGame('home_wp').shift(-1).values
+        df.loc[isFirstPlay, 'home_wpa'] = nextWP[isFirstPlay] - initWP
+        df.loc[isFirstPlay, 'home_wp'] = initWP
+
+    # fix last play border after diffing/shifting for WP and WPA
+    wp = df['home_wp'].values
+    wpa = df['home_wpa'].values.copy()
+    finalWP = _gameValues(df['bsID'], _finalWP, boxScores)
+    wpa[lastOfGame] = finalWP[lastOfGame] - wp[lastOfGame]
+    # fix WPA for timeouts and plays after timeouts
+    isTimeout = (df['isTimeout'] == True).values
+    afterTimeout = np.zeros(n, dtype=bool)
+    afterTimeout[1:] = isTimeout[:-1] & ~firstOfGame[1:]
+    nextWP = byGame('home_wp').shift(-1).values
+    wpa[afterTimeout] = np.where(lastOfGame, finalWP, nextWP)[afterTimeout] - \
+        wp[afterTimeout]
+    wpa[isTimeout] = 0.
+    df['home_wpa'] = wpa
+    return df
+
+def addTeamFeaturesFrame(df, boxScores=None):
+    """Column-wise version of addTeamFeatures for a whole DataFrame of plays,
+    which can hold several games. Also sets 'distToGoal' to 65 on kickoffs and
+    fills it in on plays without one from the next play (or the previous play,
+    at the end of a game).
+
+    :df: A DataFrame of plays after 'team', 'opp', 'home_wp' and 'home_wpa'
+    have been added.
+    :boxScores: A dict of the games' BoxScore objects (see boxScoresFor);
+    built from the plays if not given.
+    :returns: A similar DataFrame with the new features.
+    """
+    df = df.copy()
+    if boxScores is None:
+        boxScores = boxScoresFor(df['bsID'])
+    team = df['team']
+    hasTeam = team.notnull().values
+    for i in np.flatnonzero(~hasTeam):
+        print 'ERROR: team is null', df['bsID'].iat[i], df['detail'].iat[i]
+    homeOnOff = (team == df['home']).values
+    # create column for distToGoal
+    ydLine = df['ydLine'].values
+    distToGoal = np.where((team != df['fieldSide']).values,
+                          ydLine, 100 - ydLine)
+    isXPOrTwo = ((df['isXP'] == True) | (df['isTwoPoint'] == True)).values
+    distToGoal = np.where(isXPOrTwo, 2, distToGoal)
+    # create column for each team's WP and WPA
+    homeWP = df['home_wp'].values
+    homeWPA = df['home_wpa'].values
+    teamWP = np.where(homeOnOff, homeWP, 100. - homeWP)
+    teamWPA = np.where(homeOnOff, homeWPA, -homeWPA)
+    # create column for offense and defense scores
+    isHome = team.values == _gameValues(df['bsID'], lambda bs: bs.home(),
+                                       boxScores)
+    scoreHm = df['pbp_score_hm'].values
+    scoreAw = df['pbp_score_aw'].values
+    newCols = [
+        ('distToGoal', distToGoal),
+        ('team_wp', teamWP),
+        ('opp_wp', 100. - teamWP),
+        ('team_wpa', teamWPA),
+        ('opp_wpa', -teamWPA),
+        ('team_score', np.where(isHome, scoreHm, scoreAw)),
+        ('opp_score', np.where(isHome, scoreAw, scoreHm)),
+    ]
+    # plays without a team are left without these features
+    for col, values in newCols:
+        df[col] = values if hasTeam.all() else np.where(hasTeam, values, np.nan)
+
+    # fill distToGoal NaN's
+    df['distToGoal'] = np.where(df['isKickoff'] == True, 65, df['distToGoal'])
+    bsIDs = df['bsID'].values
+    distToGoal = df['distToGoal'].groupby(bsIDs, sort=False).bfill()
+    # ffill for last play of game
+    df['distToGoal'] = distToGoal.groupby(bsIDs, sort=False).ffill()
+    return df
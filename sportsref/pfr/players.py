@@ -14,7 +14,7 @@ __all__ = [
 
 yr = datetime.datetime.now().year
 
-@sportsref.decorators.memoized
+@sportsref.decorators.weakMemoized
 class Player:
 
     def __init__(self, playerID):
@@ -29,18 +29,18 @@ class Player:
     def __hash__(self):
         return hash(self.pID)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def getDoc(self):
         doc = pq(sportsref.utils.getHTML(self.mainURL))
         return doc
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def name(self):
         doc = self.getDoc()
         name = doc('div#info_box h1:first').text()
         return name
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def age(self, year=yr, month=9, day=1):
         doc = self.getDoc()
         span = doc('div#info_box span#necro-birth')
@@ -52,7 +52,7 @@ class Player:
         age = delta.days / 365.
         return age
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def position(self):
         doc = self.getDoc()
         rawText = (doc('div#info_box p')
@@ -64,7 +64,7 @@ class Player:
         # multiple positions
         return allPositions[0]
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def height(self):
         doc = self.getDoc()
         try:
@@ -79,7 +79,7 @@ class Player:
         feet, inches = map(int, rawHeight.split('-'))
         return feet*12 + inches
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def weight(self):
         doc = self.getDoc()
         rawText = (doc('div#info_box p')
@@ -88,7 +88,7 @@ class Player:
         rawWeight = re.search(r'Weight: (\S+)', rawText, re.I).group(1)
         return int(rawWeight)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def hand(self):
         doc = self.getDoc()
         rawText = (doc('div#info_box p')
@@ -97,7 +97,7 @@ class Player:
         rawHand = re.search(r'Throws: (\S+)', rawText, re.I).group(1)
         return rawHand[0] # 'L' or 'R'
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def draftPick(self):
         doc = self.getDoc()
         rawDraft = doc('div#info_box > p:first').text()
@@ -108,7 +108,7 @@ class Player:
         else:
             return int(m.group(1))
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def draftClass(self):
         doc = self.getDoc()
         rawDraft = doc('div#info_box > p:first').text()
@@ -118,7 +118,7 @@ class Player:
         else:
             return int(m.group(1))
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def draftTeam(self):
         doc = self.getDoc()
         rawDraft = doc('div#info_box > p:first')
@@ -129,7 +129,7 @@ class Player:
         else:
             return m.group(1)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def college(self):
         doc = self.getDoc()
         rawText = doc('div#info_box > p:first')
@@ -137,7 +137,7 @@ class Player:
         college = re.search(r'College: (\S+)', cleanedText).group(1)
         return college
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def highSchool(self):
         doc = self.getDoc()
         rawText = doc('div#info_box > p:first')
@@ -145,7 +145,7 @@ class Player:
         hs = re.search(r'High School: (\S{8})', cleanedText).group(1)
         return hs
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def av(self, year=yr):
         doc = self.getDoc()
         tables = doc('table[id]').filter(
@@ -168,7 +168,7 @@ class Player:
         else:
             return np.nan
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     @sportsref.decorators.kindRPB
     def gamelog(self, kind='R', year=None):
         """Gets the career gamelog of the given player.
@@ -181,14 +181,13 @@ class Player:
         url = urlparse.urljoin(
             sportsref.pfr.BASE_URL, '/players/{0[0]}/{0}/gamelog'
         ).format(self.pID)
-        doc = pq(sportsref.utils.getHTML(url))
-        table = doc('#stats') if kind == 'R' else doc('#stats_playoffs')
-        df = sportsref.utils.parseTable(table)
+        selector = '#stats' if kind == 'R' else '#stats_playoffs'
+        df = sportsref.utils.getTable(url, selector)
         if year is not None:
             df = df.query('year == @year')
         return df
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     @sportsref.decorators.kindRPB
     def passing(self, kind='R'):
         """Gets yearly passing stats for the player.
@@ -196,14 +195,12 @@ class Player:
         :kind: One of 'R', 'P', or 'B'. Case-insensitive; defaults to 'R'.
         :returns: Pandas DataFrame with passing stats.
         """
-        doc = self.getDoc()
-        table = doc('#passing') if kind == 'R' else doc('#passing_playoffs')
-        df = sportsref.utils.parseTable(table)
+        selector = '#passing' if kind == 'R' else '#passing_playoffs'
+        df = sportsref.utils.getTable(self.mainURL, selector, self.getDoc)
         return df
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def rushing_and_receiving(self):
-        doc = self.getDoc()
-        table = doc('#rushing_and_receiving')
-        df = sportsref.utils.parseTable(table)
+        df = sportsref.utils.getTable(self.mainURL, '#rushing_and_receiving',
+                                      self.getDoc)
         return df
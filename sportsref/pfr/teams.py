@@ -40,7 +40,7 @@ def teamIDs():
 def listTeams():
     return teamNames().keys()
 
-@sportsref.decorators.memoized
+@sportsref.decorators.weakMemoized
 class Team:
 
     def __init__(self, teamID):
@@ -52,23 +52,23 @@ class Team:
     def __hash__(self):
         return hash(self.teamID)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def teamYearURL(self, yr):
         return urlparse.urljoin(
             sportsref.pfr.BASE_URL, '/teams/{}/{}.htm'.format(self.teamID, yr))
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def getMainDoc(self):
         relURL = '/teams/{}'.format(self.teamID)
         teamURL = urlparse.urljoin(sportsref.pfr.BASE_URL, relURL)
         mainDoc = pq(sportsref.utils.getHTML(teamURL))
         return mainDoc
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def getYearDoc(self, year=yr):
         return pq(sportsref.utils.getHTML(self.teamYearURL(year)))
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def name(self):
         """Returns the real name of the franchise given a team ID.
 
@@ -84,7 +84,7 @@ class Team:
         teamwords = headerwords[:lastIdx]
         return ' '.join(teamwords)
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def roster(self, year=yr):
         """Returns the roster table for the given year.
 
@@ -93,7 +93,7 @@ class Team:
         """
         raise "not yet implemented"
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def boxscores(self, year=yr):
         """Gets list of BoxScore objects corresponding to the box scores from
         that year.
@@ -102,28 +102,27 @@ class Team:
         year.
         :returns: np.array of strings representing boxscore IDs.
         """
-        doc = self.getYearDoc(year)
-        table = doc('table#team_gamelogs')
-        df = sportsref.utils.parseTable(table)
+        df = sportsref.utils.getTable(self.teamYearURL(year),
+                                      'table#team_gamelogs',
+                                      lambda: self.getYearDoc(year))
         if df.empty:
             return np.array([])
         return df.boxscore_word.dropna().values
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def passing(self, year=yr):
-        doc = self.getYearDoc(year)
-        table = doc('#passing')
-        df = sportsref.utils.parseTable(table)
+        df = sportsref.utils.getTable(self.teamYearURL(year), '#passing',
+                                      lambda: self.getYearDoc(year))
         return df
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def rushingAndReceiving(self, year=yr):
-        doc = self.getYearDoc(year)
-        table = doc('#rushing_and_receiving')
-        df = sportsref.utils.parseTable(table)
+        df = sportsref.utils.getTable(self.teamYearURL(year),
+                                      '#rushing_and_receiving',
+                                      lambda: self.getYearDoc(year))
         return df
 
-    @sportsref.decorators.memoized
+    @sportsref.decorators.memoizedMethod
     def teamInfo(self, year=yr):
         doc = self.getYearDoc(year)
         teamDict = {}
@@ -0,0 +1,149 @@
+import os
+import time
+
+import appdirs
+
+import sportsref
+
+try:
+    import fcntl
+except ImportError:
+    # no flock (e.g. Windows); buckets are only shared within a process
+    fcntl = None
+
+__all__ = [
+    'RATE',
+    'BURST',
+    'LOCK_FN',
+    'TokenBucket',
+    'configure',
+    'getLimiter',
+    'acquire',
+]
+
+# requests per second allowed across all threads and processes on this host
+RATE = 2.5
+# max number of requests that can be sent back-to-back after an idle period
+BURST = 1
+# file through which processes share the bucket's state
+LOCK_FN = os.path.join(appdirs.user_cache_dir('pfr', 'mgoldberg'), 'ratelimit')
+
+class TokenBucket(object):
+
+    """Token bucket that hands out time slots to callers. Tokens refill at
+    `rate` per second up to `burst`; a caller that finds the bucket empty
+    reserves the next free slot and sleeps exactly until it comes up, so
+    callers queue up in order instead of polling.
+
+    If `path` is given (and flock is available), the bucket's state lives in
+    that file and is shared by every process that uses the same path.
+    """
+
+    def __init__(self, rate=RATE, burst=BURST, path=None):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.path = path if fcntl else None
+        self._lock = sportsref.decorators.ForkSafeLock()
+        self._tokens = self.burst
+        self._last = time.time()
+        self._fd = None
+        self._pid = None
+
+    def _openFile(self):
+        # flock is held per open file description, which is shared across a
+        # fork, so each process needs its own descriptor
+        if self._fd is None or self._pid != os.getpid():
+            if self._fd is not None:
+                # the parent's descriptor; closing our copy keeps its lock
+                os.close(self._fd)
+            dirname = os.path.dirname(self.path)
+            if dirname and not os.path.isdir(dirname):
+                try:
+                    os.makedirs(dirname)
+                except OSError:
+                    pass
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _readState(self, fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        raw = os.read(fd, 64)
+        try:
+            tokens, last = map(float, raw.split())
+        except ValueError:
+            # new or garbled file: start with a full bucket
+            tokens, last = self.burst, time.time()
+        return tokens, last
+
+    def _writeState(self, fd, tokens, last):
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, '{!r} {!r}'.format(tokens, last))
+
+    def _take(self, tokens, last):
+        now = time.time()
+        tokens = min(self.burst, tokens + max(now - last, 0.) * self.rate)
+        tokens -= 1.
+        wait = -tokens / self.rate if tokens < 0 else 0.
+        return tokens, now, wait
+
+    def reserve(self):
+        """Takes a token, going into debt if the bucket is empty.
+
+        :returns: The number of seconds the caller must wait before its slot.
+        """
+        with self._lock:
+            if not self.path:
+                self._tokens, self._last, wait = self._take(self._tokens,
+                                                            self._last)
+                return wait
+            fd = self._openFile()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                tokens, last, wait = self._take(*self._readState(fd))
+                self._writeState(fd, tokens, last)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            return wait
+
+    def acquire(self):
+        """Blocks until the caller is allowed to send a request."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+_limiter = None
+_limiterLock = sportsref.decorators.ForkSafeLock()
+
+def configure(rate=None, burst=None, lockFile=None):
+    """Changes the settings of the shared rate limiter.
+
+    :rate: Requests per second.
+    :burst: Max number of requests sent back-to-back after an idle period.
+    :lockFile: Path to the file used to share the bucket between processes;
+    False to only share it between threads of this process.
+    :returns: None
+    """
+    global RATE, BURST, LOCK_FN, _limiter
+    with _limiterLock:
+        if rate is not None:
+            RATE = rate
+        if burst is not None:
+            BURST = burst
+        if lockFile is not None:
+            LOCK_FN = lockFile
+        _limiter = None
+
+def getLimiter():
+    """Returns the module-level TokenBucket, creating it if necessary."""
+    global _limiter
+    if _limiter is None:
+        with _limiterLock:
+            if _limiter is None:
+                _limiter = TokenBucket(RATE, BURST, LOCK_FN or None)
+    return _limiter
+
+def acquire():
+    """Blocks until the shared limiter allows another request."""
+    getLimiter().acquire()
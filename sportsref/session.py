@@ -0,0 +1,85 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import sportsref
+
+__all__ = [
+    'POOL_SIZE',
+    'TIMEOUT',
+    'configure',
+    'getSession',
+    'get',
+]
+
+# max number of keep-alive connections kept open per host
+POOL_SIZE = 10
+# (connect timeout, read timeout) in seconds
+TIMEOUT = (10, 60)
+
+HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+_session = None
+_sessionPid = None
+_lock = sportsref.decorators.ForkSafeLock()
+
+def configure(poolSize=None, timeout=None, headers=None):
+    """Changes the settings of the shared HTTP session. The current session
+    (and its open connections) is discarded and a new one is created on the
+    next request.
+
+    :poolSize: Max number of connections kept alive per host.
+    :timeout: Either a number of seconds or a (connect, read) tuple.
+    :headers: Dict of extra headers to send with every request.
+    :returns: None
+    """
+    global POOL_SIZE, TIMEOUT, _session
+    with _lock:
+        if poolSize is not None:
+            POOL_SIZE = poolSize
+        if timeout is not None:
+            TIMEOUT = timeout
+        if headers is not None:
+            HEADERS.update(headers)
+        if _session is not None:
+            _session.close()
+        _session = None
+
+def getSession():
+    """Returns the module-level requests.Session, creating it if necessary.
+    The session pools connections so that consecutive requests to the same
+    host reuse an open keep-alive connection.
+
+    :returns: A requests.Session object.
+    """
+    global _session, _sessionPid
+    # a forked child gets its own session rather than sharing the parent's
+    # pooled sockets
+    if _session is None or _sessionPid != os.getpid():
+        with _lock:
+            if _session is None or _sessionPid != os.getpid():
+                s = requests.Session()
+                # retries are handled by getHTML's backoff loop, not urllib3
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE,
+                                      pool_maxsize=POOL_SIZE,
+                                      max_retries=0)
+                s.mount('http://', adapter)
+                s.mount('https://', adapter)
+                s.headers.update(HEADERS)
+                _session = s
+                _sessionPid = os.getpid()
+    return _session
+
+def get(url, **kwargs):
+    """Sends a GET request through the shared session.
+
+    :url: The absolute URL to request.
+    :kwargs: Passed on to requests.Session.get; `timeout` defaults to TIMEOUT.
+    :returns: A requests.Response object.
+    """
+    kwargs.setdefault('timeout', TIMEOUT)
+    return getSession().get(url, **kwargs)
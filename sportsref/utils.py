@@ -1,35 +1,87 @@
+import hashlib
+import inspect
+from multiprocessing.pool import ThreadPool
+import os
 import re
+import tempfile
 import time
 
+import numpy as np
 import pandas as pd
 from pyquery import PyQuery as pq
 import requests
 
 import sportsref
 
+# max number of requests in flight for getHTMLAsync and fetchMany
+MAX_IN_FLIGHT = 8
+
+# max number of attempts getHTML makes before giving up on a URL
+MAX_TRIES = 10
+# seconds getHTML waits after the first timeout; doubled after each one
+TIMEOUT_BACKOFF = 2
+
+# bump to invalidate all stored parsed tables by hand; they are also
+# invalidated automatically when this module's source or pandas changes
+PARSER_VERSION = 1
+
+# compact dtype for each column (by data-stat, after parseTable's renames) of
+# parsed tables: categoricals for IDs repeated across rows, small ints for
+# counts; see compactTypes. hasClass_* columns are always made bool.
+COLUMN_TYPES = {
+    'team': 'category',
+    'opp': 'category',
+    'player': 'category',
+    'pos': 'category',
+    'game_location': 'category',
+    'year': np.int16,
+    'week_num': np.int8,
+    'game_num': np.int8,
+    'quarter': np.int8,
+    'down': np.int8,
+    'yds_to_go': np.int8,
+    'pbp_score_aw': np.int16,
+    'pbp_score_hm': np.int16,
+}
+
 @sportsref.decorators.memoized
+@sportsref.decorators.singleFlight
 @sportsref.decorators.cacheHTML
-def getHTML(url):
-    """Gets the HTML for the given URL using a GET request.
+def getHTML(url, headers=None):
+    """Gets the HTML for the given URL using a GET request through the shared
+    keep-alive session (see sportsref.session).
 
-    Incorporates an exponential timeout starting with 2 seconds.
+    Every attempt first takes a slot from the shared rate limiter (see
+    sportsref.ratelimit). Incorporates an exponential backoff after timeouts,
+    starting with TIMEOUT_BACKOFF seconds; once MAX_TRIES attempts have
+    failed, the last error is raised.
 
     :url: the absolute URL of the desired page.
-    :returns: a string of HTML.
+    :headers: extra request headers; cacheHTML uses these to revalidate stale
+    cache entries.
+    :returns: a string of HTML. (The undecorated function returns the
+    requests.Response, which cacheHTML turns into the string.)
 
     """
     K = 60*3 # K is length of next backoff (in seconds)
-    TOTAL_TIME = 0.4 # num of secs we we wait between last request & return
-    html = None
+    T = TIMEOUT_BACKOFF # T is length of next backoff after a timeout
+    resp = None
     numTries = 0
-    while not html and numTries < 10:
+    while resp is None:
         numTries += 1
-        start = time.time()
+        sportsref.ratelimit.acquire()
         try:
-            html = requests.get(url).content
+            resp = sportsref.session.get(url, headers=headers)
+        except requests.Timeout:
+            # slow response; wait and try again, up to MAX_TRIES times
+            if numTries >= MAX_TRIES:
+                raise
+            time.sleep(T)
+            T = min(T*2, 60)
+            continue
         except requests.ConnectionError as e:
             errnum = e.args[0].args[1].errno
-            if errnum == 61:
+            if errnum == 61 and numTries < MAX_TRIES:
                 # Connection Refused
                 if K >= 60:
                     print 'Waiting {} minutes...'.format(K/60.0)
@@ -42,14 +94,101 @@ def getHTML(url):
                 K *= 2
                 K = min(K, 60*60)
             else:
-                # Some other error code
+                # Some other error code, or out of tries
                 raise e
-    timeOnRequest = time.time() - start
-    timeRemaining = int(1000*(TOTAL_TIME - timeOnRequest)) # in milliseconds
-    for _ in xrange(timeRemaining):
-        # wait one millisecond
-        time.sleep(0.001)
-    return html
+    return resp
+
+_pool = None
+_poolPid = None
+_poolLock = sportsref.decorators.ForkSafeLock()
+
+def _getPool():
+    global _pool, _poolPid
+    # the parent's worker threads don't exist in a forked child
+    if _pool is None or _poolPid != os.getpid():
+        with _poolLock:
+            if _pool is None or _poolPid != os.getpid():
+                _pool = ThreadPool(MAX_IN_FLIGHT)
+                _poolPid = os.getpid()
+    return _pool
+
+def getHTMLAsync(url):
+    """Starts fetching the HTML for the given URL in the background, going
+    through the same cache, rate limit and backoff as getHTML.
+
+    :url: the absolute URL of the desired page.
+    :returns: an AsyncResult; its get() method returns the string of HTML.
+    """
+    return _getPool().apply_async(getHTML, (url,))
+
+def fetchMany(urls, maxInFlight=None):
+    """Fetches the HTML for many URLs with up to `maxInFlight` requests in
+    flight at once. Since getHTML is memoized, later calls for these URLs
+    (e.g., BoxScore(bsID).getDoc()) return immediately.
+
+    :urls: an iterable of absolute URLs.
+    :maxInFlight: max number of concurrent requests; defaults to MAX_IN_FLIGHT.
+    :returns: a list of strings of HTML, in the same order as `urls`.
+    """
+    urls = list(urls)
+    if not maxInFlight or maxInFlight == MAX_IN_FLIGHT:
+        return _getPool().map(getHTML, urls)
+    pool = ThreadPool(maxInFlight)
+    try:
+        return pool.map(getHTML, urls)
+    finally:
+        pool.close()
+
+def writeFileAtomic(fn, data):
+    """Writes `data` to the file `fn` by writing a temporary file in the same
+    directory and renaming it over `fn`, so that concurrent readers see
+    either the old or the new contents, never a partial file.
+
+    :fn: the path of the file.
+    :data: the (byte) string to write.
+    :returns: None
+    """
+    fd, tmpFN = tempfile.mkstemp(dir=os.path.dirname(fn) or '.',
+                                 prefix='.' + os.path.basename(fn))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.rename(tmpFN, fn)
+    except:
+        if os.path.exists(tmpFN):
+            os.remove(tmpFN)
+        raise
+
+# text that PyQuery's text() squashes and strips down to nothing
+_BLANK_RE = re.compile(u'^[\\s\u200b]*$', re.UNICODE)
+_STAR_PLUS_RE = re.compile(r'[\*\+]')
+
+def _flattenCell(td, ids):
+    """Same as flattenLinks, but for a raw lxml element rather than a
+    PyQuery object.
+
+    :td: the lxml element of the cell
+    :ids: dict mapping the hrefs of the cell's links to IDs
+    :returns: the string with the links flattened to IDs, or None if the cell
+    has no text
+    """
+    # same as `not pq(td).text()`
+    if _BLANK_RE.match(''.join(td.xpath('descendant::text()'))):
+        return None
+
+    # same as the contents() of the cell: its text nodes and child elements,
+    # skipping comments but not their tails
+    parts = [td.text] if td.text else []
+    for c in td:
+        if isinstance(c.tag, basestring):
+            if 'href' in c.attrib:
+                cID = ids[c.attrib['href']]
+                parts.append(cID if cID else c.text_content())
+            else:
+                parts.append(c.text_content())
+        if c.tail:
+            parts.append(c.tail)
+    return ''.join(parts)
 
 def parseTable(table):
     """Parses a table from SR into a pandas dataframe.
@@ -61,14 +200,37 @@ def parseTable(table):
         return pd.DataFrame()
     # get columns
     columns = [c.attrib['data-stat']
-               for c in table('thead tr[class=""] th[data-stat]')]
+               for t in table
+               for c in t.xpath('descendant-or-self::thead//'
+                                'tr[@class = ""]//th[@data-stat]')]
+
+    # get the cells and row classes in a single pass over the raw elements
+    rowCells = []
+    rowClasses = []
+    for t in table:
+        for row in t.xpath('descendant-or-self::tbody//tr'):
+            classAttr = row.get('class')
+            classes = classAttr.split() if classAttr else ()
+            if 'thead' in classes or 'stat_total' in classes:
+                continue
+            rowCells.append(row.xpath('descendant-or-self::td'))
+            rowClasses.append((classAttr, classes))
+
+    # convert all the links to IDs at once
+    hrefs = [c.attrib['href']
+             for tds in rowCells for td in tds for c in td
+             if isinstance(c.tag, basestring) and 'href' in c.attrib]
+    ids = dict(zip(hrefs, relURLsToIDs(hrefs))) if hrefs else {}
 
     # get data
-    rows = list(table('tbody tr').not_('.thead, .stat_total').items())
-    data = [
-        [flattenLinks(td) for td in row.items('td')]
-        for row in rows
-    ]
+    data = []
+    hasMarks = False
+    for tds in rowCells:
+        cells = [_flattenCell(td, ids) for td in tds]
+        hasMarks = hasMarks or any(
+            c and ('*' in c or '+' in c) for c in cells
+        )
+        data.append(cells)
 
     # make DataFrame
     df = pd.DataFrame(data, columns=columns, dtype='float')
@@ -76,15 +238,13 @@ def parseTable(table):
     # add hasClass columns
     allClasses = set(
         cls
-        for row in rows
-        if row.attr['class']
-        for cls in row.attr['class'].split()
+        for _, classes in rowClasses
+        for cls in classes
     )
     for cls in allClasses:
         df['hasClass_' + cls] = [
-            row.attr['class'] and
-            cls in row.attr['class'].split()
-            for row in rows
+            classAttr and cls in classes
+            for classAttr, classes in rowClasses
         ]
 
     # small fixes to DataFrame
@@ -102,9 +262,204 @@ def parseTable(table):
     if 'game_date' in df.columns:
         df.rename(columns={'game_date': 'bsID'}, inplace=True)
 
-    # ignore * and + to note things
-    df.replace(re.compile(r'[\*\+]'), '', inplace=True)
+    # ignore * and + to note things; skipped when no cell has either
+    if hasMarks:
+        df.replace(_STAR_PLUS_RE, '', inplace=True)
+
+    return compactTypes(df)
 
+def compactTypes(df):
+    """Converts the columns of a parsed table to the compact dtypes given in
+    COLUMN_TYPES, and hasClass_* columns to bool. A numeric column gets its
+    int type only if it has no missing values (float32 otherwise), and a
+    column whose values don't fit its type is left as it is.
+
+    :df: the DataFrame from parseTable; changed in place.
+    :returns: the same DataFrame
+    """
+    if not df.columns.is_unique:
+        return df
+    for col in df.columns:
+        if col.startswith('hasClass_'):
+            # None (no class attribute) and '' (empty one) become False
+            df[col] = df[col].astype(bool)
+            continue
+        dtype = COLUMN_TYPES.get(col)
+        if dtype is None:
+            continue
+        s = df[col]
+        if dtype == 'category':
+            if s.dtype == object:
+                df[col] = s.astype('category')
+        elif s.dtype.kind in 'fiu':
+            vals = s.dropna()
+            info = np.iinfo(dtype)
+            if (not vals.empty and (vals % 1 == 0).all() and
+                    vals.min() >= info.min and vals.max() <= info.max):
+                df[col] = s.astype(dtype if len(vals) == len(s)
+                                   else np.float32)
+    return df
+
+def concatTables(dfs, **kwargs):
+    """Concatenates parsed tables like pd.concat, but keeps their categorical
+    columns categorical. pd.concat only does that when every frame's column
+    has the same categories, which tables from different pages (or seasons)
+    rarely do; here each such column gets the union of the categories first.
+
+    :dfs: a sequence of DataFrames from parseTable.
+    :kwargs: passed on to pd.concat.
+    :returns: the concatenated DataFrame
+    """
+    dfs = list(dfs)
+    if not all(df.columns.is_unique for df in dfs):
+        return pd.concat(dfs, **kwargs)
+    catCols = sorted(set(
+        col for df in dfs for col in df.columns
+        if pd.api.types.is_categorical_dtype(df[col])
+    ))
+    categories = {}
+    for col in catCols:
+        values = set()
+        for df in dfs:
+            if col not in df.columns:
+                continue
+            s = df[col]
+            if pd.api.types.is_categorical_dtype(s):
+                values.update(s.cat.categories)
+            else:
+                values.update(s.dropna().unique())
+        categories[col] = sorted(values)
+        dfs = [
+            df.assign(**{col: pd.Categorical(df[col],
+                                             categories=categories[col])})
+            if col in df.columns else df
+            for df in dfs
+        ]
+    df = pd.concat(dfs, **kwargs)
+    for col in catCols:
+        # a frame without the column adds missing values, which pd.concat
+        # can only store in an object column
+        if not pd.api.types.is_categorical_dtype(df[col]):
+            df[col] = pd.Categorical(df[col], categories=categories[col])
+    return df
+
+@sportsref.decorators.memoized
+def _sourceVersion():
+    h = hashlib.sha1('{}:{}'.format(PARSER_VERSION, pd.__version__))
+    try:
+        h.update(inspect.getsource(sportsref.utils))
+    except (IOError, TypeError):
+        # source not available; fall back to the manual version
+        pass
+    return h.hexdigest()
+
+def parserVersion():
+    """Returns a stamp identifying the code that turns pages into DataFrames
+    (and the COLUMN_TYPES it uses), used to key the parsed tables stored by
+    getTable.
+
+    :returns: A hex string.
+    """
+    types = sorted((col, np.dtype(t).name if t != 'category' else t)
+                   for col, t in COLUMN_TYPES.iteritems())
+    return hashlib.sha1(_sourceVersion() + repr(types)).hexdigest()
+
+# selectors that name a single table by its id, e.g. '#passing' or
+# 'table#pbp_data'; see getTableDoc
+_ID_SELECTOR_RE = re.compile(r'^(?:table)?#([\w-]+)$')
+_TABLE_TAG_RE = re.compile(r'<(/?)table\b', re.IGNORECASE)
+_CHARSET_RE = re.compile(r'<meta\b[^>]*charset=["\']?([\w-]+)', re.IGNORECASE)
+
+def tableHTML(html, tableID):
+    """Finds the HTML of the table with the given id in a page, without
+    parsing the rest of the page. Tables inside HTML comments are skipped, as
+    an HTML parser would skip them.
+
+    :html: the HTML of the page.
+    :tableID: the id of the table.
+    :returns: the HTML of the table, or None if the page doesn't have exactly
+    one such table (or it couldn't be found reliably).
+    """
+    idRE = re.compile(
+        r'<table\b[^>]*[\s"\']id\s*=\s*["\']?{}["\'\s>]'.format(
+            re.escape(tableID)
+        ),
+        re.IGNORECASE
+    )
+    found = None
+    for match in idRE.finditer(html):
+        start = match.start()
+        if html.rfind('<!--', 0, start) > html.rfind('-->', 0, start):
+            continue
+        if found is not None:
+            return None
+        # find the matching closing tag, minding nested tables
+        depth = 0
+        for tag in _TABLE_TAG_RE.finditer(html, start):
+            depth += -1 if tag.group(1) else 1
+            if not depth:
+                end = html.find('>', tag.end())
+                break
+        else:
+            end = -1
+        if end == -1:
+            return None
+        found = html[start:end+1]
+    return found
+
+def getTableDoc(url, selector, doc=None):
+    """Returns the PyQuery object for the elements matched by `selector` on
+    the page at `url`. If the selector names a table by id (e.g. '#passing'),
+    only that table's HTML is parsed instead of the whole page.
+
+    :url: the absolute URL of the page.
+    :selector: CSS selector, e.g. 'table#ref_info'.
+    :doc: optional function returning the PyQuery document for `url`; used
+    when the table can't be extracted on its own.
+    :returns: PyQuery object
+    """
+    match = _ID_SELECTOR_RE.match(selector)
+    if match:
+        html = getHTML(url)
+        fragment = tableHTML(html, match.group(1))
+        if fragment is not None:
+            # decode the table the way the page's own charset would be
+            charset = _CHARSET_RE.search(html)
+            try:
+                if charset and not isinstance(fragment, unicode):
+                    fragment = fragment.decode(charset.group(1))
+            except (LookupError, UnicodeDecodeError):
+                pass
+            else:
+                return pq(fragment, parser='html')(selector)
+    doc = doc() if doc else pq(getHTML(url))
+    return doc(selector)
+
+def getTable(url, selector, doc=None):
+    """Returns the DataFrame from parseTable for the table matched by
+    `selector` on the page at `url`. Parsed tables are stored in the page
+    cache, so as long as the page is fresh (or revalidates as unchanged),
+    later calls (even in other processes) skip HTML parsing altogether.
+
+    :url: the absolute URL of the page.
+    :selector: CSS selector for the table, e.g. '#passing'.
+    :doc: optional function returning the PyQuery document for `url`; used
+    to share an already-parsed document on a miss when the table can't be
+    extracted on its own (see getTableDoc).
+    :returns: Pandas dataframe
+    """
+    store = sportsref.cache.getStore()
+    version = parserVersion()
+    df, fetched = store.getTable(url, selector, version)
+    if df is not None and not sportsref.freshness.isFresh(url, fetched):
+        # revalidate the page; if it hasn't changed (304 Not Modified), the
+        # stored table is kept and is fresh again
+        getHTML(url)
+        df, fetched = store.getTable(url, selector, version)
+    if df is not None and sportsref.freshness.isFresh(url, fetched):
+        return df
+    df = parseTable(getTableDoc(url, selector, doc))
+    store.putTable(url, selector, version, df)
     return df
 
 def flattenLinks(td):
@@ -132,7 +487,29 @@ def flattenLinks(td):
 
     return ''.join(_flattenC(c) for c in td.contents())
 
-@sportsref.decorators.memoized
+# the ID returned for URLs that don't match any type of ID
+NO_ID = 'noIDer00'
+
+# max number of URLs whose IDs are remembered by relURLToID
+ID_MEMO_SIZE = 2**16
+
+# (substring the URL must contain, regex) for each type of ID, in the order
+# they are tried; a regex can only match URLs containing its substring, so the
+# cheap `in` test skips most of them
+_ID_REGEXES = [(keyword, re.compile(regex)) for keyword, regex in [
+    ('/players/', r'.*/players/(?:[A-Z]/)?(.+?)(?:/|\.html?)'),
+    ('/boxscores/', r'/boxscores/(.+?)\.html?'),
+    ('/teams/', r'/teams/(\w{3})/.*'),
+    ('/years/', r'.*/years/(\d{4})(?:_AFL)?/.*'),
+    ('/coaches/', r'/coaches/(.+?)\.html?'),
+    ('/stadiums/', r'/stadiums/(.+?)\.html?'),
+    ('/officials/', r'/officials/(.+?r)\.html?'),
+    ('/schools/', r'.*/schools/(\S+?)/.*'),
+    ('/schools/high_schools.cgi?id=',
+     r'/schools/high_schools\.cgi\?id=([^\&]{8})'),
+]]
+
+@sportsref.decorators.memoized(maxsize=ID_MEMO_SIZE)
 def relURLToID(url):
     """Converts relative PFR URL to ID.
 
@@ -153,33 +530,53 @@ def relURLToID(url):
 
     :returns: ID associated with the given relative URL.
     """
-    playerRegex = re.compile(r'.*/players/(?:[A-Z]/)?(.+?)(?:/|\.html?)')
-    boxscoresRegex = re.compile(r'/boxscores/(.+?)\.html?')
-    teamRegex = re.compile(r'/teams/(\w{3})/.*')
-    yearRegex = re.compile(r'.*/years/(\d{4})(?:_AFL)?/.*')
-    coachRegex = re.compile(r'/coaches/(.+?)\.html?')
-    stadiumRegex = re.compile(r'/stadiums/(.+?)\.html?')
-    refRegex = re.compile(r'/officials/(.+?r)\.html?')
-    collegeRegex = re.compile(r'.*/schools/(\S+?)/.*')
-    hsRegex = re.compile(r'/schools/high_schools\.cgi\?id=([^\&]{8})')
-
-    regexes = [
-        playerRegex,
-        boxscoresRegex,
-        teamRegex,
-        yearRegex,
-        coachRegex,
-        stadiumRegex,
-        refRegex,
-        collegeRegex,
-        hsRegex,
-    ]
-
-    for regex in regexes:
-        match = regex.search(url)
-        if match:
-            return match.group(1)
+    for keyword, regex in _ID_REGEXES:
+        if keyword in url:
+            match = regex.search(url)
+            if match:
+                return match.group(1)
 
     print 'WARNING. NO MATCH WAS FOUND FOR "{}"'.format(url)
-    return 'noIDer00'
+    return NO_ID
+
+def relURLsToIDs(urls):
+    """Vectorized version of relURLToID: converts many relative URLs to IDs
+    at once. URLs that relURLToID's memo already knows are looked up there;
+    the rest are matched a whole column at a time with str.extract, one pass
+    per type of ID, and their IDs (and the warning for unmatched URLs) go
+    into the same memo, so bulk and single lookups agree and each unmatched
+    URL is only warned about once.
+
+    :urls: A sequence, array or Series of relative URLs; missing values are
+    left as they are.
+    :returns: A Series of IDs (with the same index as `urls` if it is a
+    Series).
+    """
+    if not isinstance(urls, pd.Series):
+        urls = pd.Series(list(urls), dtype=object)
+    uniq = urls.dropna().unique()
+    ids = {args[0]: urlID for args, urlID
+           in relURLToID.cache_get_many((url,) for url in uniq).iteritems()}
+    unknown = [url for url in uniq if url not in ids]
+
+    if unknown:
+        remaining = pd.Series(unknown, dtype=object)
+        found = pd.Series(NO_ID, index=remaining.index, dtype=object)
+        # try each type of ID in turn on the URLs that haven't matched yet
+        for keyword, regex in _ID_REGEXES:
+            if remaining.empty:
+                break
+            candidates = remaining[remaining.str.contains(keyword,
+                                                          regex=False)]
+            if candidates.empty:
+                continue
+            matched = candidates.str.extract(regex, expand=False).dropna()
+            found[matched.index] = matched
+            remaining = remaining.drop(matched.index)
+
+        for url in remaining:
+            print 'WARNING. NO MATCH WAS FOUND FOR "{}"'.format(url)
+        ids.update(zip(unknown, found))
+        relURLToID.cache_put_many(((url,), ids[url]) for url in unknown)
 
+    return urls.map(ids)
@@ -0,0 +1,69 @@
+"""Compares the page cache's codecs: bytes stored against the time it takes
+to read a page back (see sportsref.cache.compress).
+
+Run from the repository root with:
+
+    python -m tests.bench_cache [cache database] [max pages]
+
+The pages come from the given cache database (by default, the user's page
+cache), or from tests/fixtures/site if there is none.
+"""
+import os
+import sys
+import time
+
+from tests import support
+
+from sportsref import cache
+
+def corpus(path=None, maxPages=500):
+    """Loads up to `maxPages` pages from a cache database, without touching
+    their access times, or the fixture pages if there is no database.
+
+    :returns: A list of (URL, HTML) pairs.
+    """
+    path = path or cache.DB_FN
+    if not os.path.isfile(path):
+        pages = support.sitePages()
+        return [(url, open(fn, 'rb').read())
+                for url, fn in sorted(pages.items())]
+    rows = cache.SQLiteStore(path)._conn().execute(
+        'SELECT url, body FROM pages ORDER BY random() LIMIT ?', (maxPages,)
+    )
+    pages = []
+    for url, body in rows:
+        try:
+            pages.append((url, cache.decompress(str(body))))
+        except cache.DECODE_ERRORS:
+            pass
+    return pages
+
+def main(path=None, maxPages=500, repeat=5):
+    pages = corpus(path, int(maxPages))
+    rawBytes = sum(len(html) for _, html in pages)
+    print '%d pages, %.1f kB of HTML' % (len(pages), rawBytes / 1e3)
+    codecs = [None, 'zlib'] + (['zstd'] if cache.zstd else [])
+    origCodec = cache.COMPRESSION
+    try:
+        for codec in codecs:
+            cache.COMPRESSION = codec
+            cacheDir = support.resetCache()
+            store = cache.SQLiteStore(os.path.join(cacheDir, 'bench.sqlite'))
+            for url, html in pages:
+                store.put(url, html)
+            stored = store.stats()['bytes']
+            start = time.time()
+            for _ in xrange(repeat):
+                for url, _ in pages:
+                    store.get(url)
+            perRead = (time.time() - start) / (repeat * len(pages))
+            saved = 100. * (1 - stored / float(rawBytes))
+            print '%-5s %10.1f kB stored (%5.1f%% saved) %8.3f ms/read' % (
+                codec or 'raw', stored / 1e3, saved, perRead * 1e3
+            )
+    finally:
+        cache.COMPRESSION = origCodec
+        support.removeCaches()
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,50 @@
+"""Measures requests/sec against a local fixture server with the shared
+keep-alive session (see sportsref.session) and with a new connection per
+request, as getHTML used to make.
+
+Run from the repository root with:
+
+    python -m tests.bench_http [number of requests]
+"""
+import sys
+import time
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+from tests import support
+
+import sportsref
+
+def unpooledGet(url):
+    return requests.get(url, timeout=sportsref.session.TIMEOUT)
+
+def pooledGet(url):
+    return sportsref.session.get(url)
+
+def rate(label, get, urls, threads=1):
+    start = time.time()
+    if threads == 1:
+        resps = map(get, urls)
+    else:
+        pool = ThreadPool(threads)
+        try:
+            resps = pool.map(get, urls)
+        finally:
+            pool.close()
+    elapsed = time.time() - start
+    assert all(resp.status_code == 200 for resp in resps)
+    print '%-35s %8.1f req/s' % (label, len(urls) / elapsed)
+
+def main(numRequests=500):
+    with support.FixtureServer() as server:
+        urls = [server.baseURL + '/boxscores/201409070nwe.htm'] * numRequests
+        print '%d requests' % numRequests
+        for threads in (1, sportsref.utils.MAX_IN_FLIGHT):
+            rate('unpooled, %d thread(s)' % threads, unpooledGet, urls,
+                 threads)
+            rate('pooled, %d thread(s)' % threads, pooledGet, urls, threads)
+    support.removeCaches()
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,68 @@
+"""Measures what minifying pages before caching them (see
+sportsref.cache.minify) saves: bytes stored and the time it takes to parse
+each page and its tables.
+
+Run from the repository root with:
+
+    python -m tests.bench_minify [cache database] [max pages]
+
+The pages are the boxscore and player pages in the given cache database (by
+default, the user's page cache). If there are none, the fixture boxscores
+are used, with scripts, styles and comments added (see
+tests.test_cache.noisy).
+"""
+import sys
+import time
+
+from pyquery import PyQuery as pq
+
+from tests import support
+from tests.bench_cache import corpus
+from tests.test_cache import noisy
+from tests.test_utils import captureOutput
+
+from sportsref import cache, utils
+
+def samplePages(path=None, maxPages=200):
+    pages = [(url, html) for url, html in corpus(path, maxPages * 5)
+             if '/boxscores/' in url or '/players/' in url][:maxPages]
+    if not any(url.startswith('http') for url, _ in pages):
+        pages = [(url, noisy(html)) for url, html in pages]
+    return pages
+
+def parseDocs(pages):
+    return [pq(html.decode('utf-8', 'replace'), parser='html')
+            for html in pages]
+
+def parseTables(pages):
+    for doc in parseDocs(pages):
+        for table in doc('table[id]').items():
+            captureOutput(utils.parseTable, table)
+
+def timed(func, pages, repeat):
+    """Returns the best time of `repeat` runs of func(pages)."""
+    func(pages)
+    best = float('inf')
+    for _ in xrange(repeat):
+        start = time.time()
+        func(pages)
+        best = min(best, time.time() - start)
+    return best
+
+def main(path=None, maxPages=200, repeat=None):
+    pages = samplePages(path, int(maxPages))
+    raw = [html for _, html in pages]
+    small = [cache.minify(html) for html in raw]
+    repeat = int(repeat or 10)
+    print '%d pages' % len(pages)
+    print '%-9s %10s %14s %14s' % ('', 'kB', 'ms (page)', 'ms (+tables)')
+    for label, htmls in (('raw', raw), ('minified', small)):
+        print '%-9s %10.1f %14.2f %14.2f' % (
+            label, sum(map(len, htmls)) / 1e3,
+            timed(parseDocs, htmls, repeat) * 1e3,
+            timed(parseTables, htmls, repeat) * 1e3
+        )
+    support.removeCaches()
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
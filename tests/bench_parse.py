@@ -0,0 +1,73 @@
+"""Times parseTable against the PyQuery version it replaced (see
+tests.test_utils.oldParseTable, plus compactTypes so that both build the same
+DataFrames) on every table of a sample of saved pages, and on one big table
+made by repeating the rows of the fixture game's play-by-play.
+
+Run from the repository root with:
+
+    python -m tests.bench_parse [cache database] [max pages]
+
+The pages come from the given cache database (by default, the user's page
+cache), or from tests/fixtures/site if there is none.
+"""
+import sys
+import time
+
+from pyquery import PyQuery as pq
+
+from tests import support
+from tests.bench_cache import corpus
+from tests.test_utils import captureOutput, oldParseTable
+
+from sportsref import utils
+
+def timeTables(label, parse, tables, repeat):
+    start = time.time()
+    for _ in xrange(repeat):
+        for table in tables:
+            captureOutput(parse, table)
+    elapsed = (time.time() - start) / repeat
+    print '%-30s %8.1f ms per pass' % (label, elapsed * 1e3)
+    return elapsed
+
+def oldParse(table):
+    return utils.compactTypes(oldParseTable(table))
+
+def bigTable(copies=100):
+    """Returns the fixture game's play-by-play table with its rows repeated
+    `copies` times, about the size of a long career gamelog.
+    """
+    fn = support.fixturePath('site/boxscores/201409070nwe.htm')
+    with open(fn, 'rb') as f:
+        table = pq(f.read().decode('utf-8'), parser='html')('table#pbp_data')
+    tbody = table('tbody')
+    rows = tbody.html()
+    tbody.html(rows * copies)
+    return table
+
+def compare(tables, repeat):
+    # warm up relURLToID's memo, as a long-running process would have it
+    captureOutput(lambda: [utils.parseTable(t) for t in tables])
+    old = timeTables('PyQuery + flattenLinks', oldParse, tables, repeat)
+    new = timeTables('parseTable (raw lxml)', utils.parseTable, tables,
+                     repeat)
+    print '%.1fx faster' % (old / new)
+
+def main(path=None, maxPages=100, repeat=None):
+    pages = corpus(path, int(maxPages))
+    tables = []
+    for _, html in pages:
+        doc = pq(html.decode('utf-8', 'replace'), parser='html')
+        tables.extend(doc('table[id]').items())
+    numRows = sum(len(table('tbody tr')) for table in tables)
+    print '%d pages, %d tables, %d rows' % (len(pages), len(tables), numRows)
+    repeat = int(repeat or max(1, 20000 // max(numRows, 1)))
+    compare(tables, repeat)
+
+    table = bigTable()
+    print '1 table, %d rows' % len(table('tbody tr'))
+    compare([table], 3)
+    support.removeCaches()
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
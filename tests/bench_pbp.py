@@ -0,0 +1,91 @@
+"""Times the column-wise play-by-play parsing against the row-wise versions
+it replaced, on a season's worth of plays, and BoxScore.pbp() throughput with
+teamAndOpp memoized by its fields (see sportsref.decorators.fieldsKey) and by
+the whole play.
+
+Run from the repository root with:
+
+    python -m tests.bench_pbp [number of plays] [number of games]
+"""
+import datetime
+import sys
+import time
+
+import pandas as pd
+
+from tests import support
+from tests.test_clean_features import (cleanRowWise, preCleaned,
+                                       samplePlays)
+from tests.test_play_details import dictsToFrame, loadCorpus
+
+import sportsref
+from sportsref.pfr import pbp
+
+def timed(label, func, *args):
+    start = time.time()
+    result = func(*args)
+    print '%-45s %8.3fs' % (label, time.time() - start)
+    return result
+
+def pbpThroughput(numGames):
+    """Times BoxScore.pbp() on the fixture game, served under `numGames`
+    boxscore IDs, with warm page caches but nothing memoized.
+    """
+    start = datetime.date(2014, 9, 1)
+    bsIDs = ['{:%Y%m%d}0nwe'.format(start + datetime.timedelta(days=i))
+             for i in xrange(numGames)]
+    pages = support.sitePages()
+    for bsID in bsIDs:
+        pages['/boxscores/{}.htm'.format(bsID)] = \
+            pages['/boxscores/201409070nwe.htm']
+    fieldsKeyed = pbp.teamAndOpp
+    wholePlay = sportsref.decorators.memoized(fieldsKeyed.__wrapped__)
+    with support.FixtureServer(pages) as server:
+        sportsref.utils.fetchMany(
+            [server.baseURL + '/boxscores/{}.htm'.format(bsID)
+             for bsID in bsIDs]
+        )
+        try:
+            for label, func in (('whole play', wholePlay),
+                                ('fieldsKey', fieldsKeyed)):
+                pbp.teamAndOpp = func
+                sportsref.decorators.clearMemoized()
+                begin = time.time()
+                for bsID in bsIDs:
+                    sportsref.pfr.boxscores.BoxScore(bsID).pbp()
+                elapsed = time.time() - begin
+                print '%-45s %8.3fs %6.1f games/s' % (
+                    'pbp(), teamAndOpp keyed by %s' % label, elapsed,
+                    numGames / elapsed
+                )
+        finally:
+            pbp.teamAndOpp = fieldsKeyed
+
+def main(numPlays=10000, numGames=50):
+    corpus = [d for d, _ in loadCorpus()]
+    # distinct strings, so that the parser's memo doesn't do all the work
+    details = ['%s %d' % (corpus[i % len(corpus)], i)
+               for i in xrange(numPlays)]
+    print '%d plays' % numPlays
+
+    pbp.parsePlayDetails.cache_clear()
+    timed('dicts -> DataFrame', lambda: dictsToFrame(
+        [pbp.parsePlayDetails(d) for d in details]))
+    pbp.parsePlayDetails.cache_clear()
+    timed('parsePlayDetailsFrame', pbp.parsePlayDetailsFrame,
+          pd.Series(details))
+
+    with support.FixtureServer():
+        for compact in (False, True):
+            pre = preCleaned(samplePlays(details, compact=compact))
+            kind = 'compact types' if compact else 'plain types'
+            timed('cleanFeatures row-wise (%s)' % kind, cleanRowWise, pre)
+            timed('cleanFeaturesFrame (%s)' % kind,
+                  pbp.cleanFeaturesFrame, pre)
+
+    print '%d games' % numGames
+    pbpThroughput(numGames)
+    support.removeCaches()
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,192 @@
+"""Common setup for the tests. Importing this module makes `sportsref`
+importable without touching the network (sportsref.pfr normally downloads
+the finder constants at import time) and points the page cache and the rate
+limiter at a temporary directory instead of the user's cache.
+"""
+import BaseHTTPServer
+import SocketServer
+import collections
+import hashlib
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# a bare sportsref.pfr package, so that its modules can be imported without
+# running sportsref/pfr/__init__.py (which imports the finders)
+if 'sportsref.pfr' not in sys.modules:
+    _pfr = types.ModuleType('sportsref.pfr')
+    _pfr.__path__ = [os.path.join(ROOT, 'sportsref', 'pfr')]
+    _pfr.BASE_URL = 'http://www.pro-football-reference.com'
+    sys.modules['sportsref.pfr'] = _pfr
+
+import sportsref
+import sportsref.pfr.boxscores
+import sportsref.pfr.pbp
+import sportsref.pfr.players
+import sportsref.pfr.teams
+import sportsref.pfr.winProb
+
+CACHE_DIR = tempfile.mkdtemp(prefix='sportsref-tests-')
+
+def resetCache():
+    """Starts over with an empty page cache and empty memoization caches, in
+    a fresh temporary directory.
+
+    :returns: The path of the new cache directory.
+    """
+    cacheDir = tempfile.mkdtemp(dir=CACHE_DIR)
+    sportsref.cache.CACHE_DIR = cacheDir
+    sportsref.cache.configure(path=os.path.join(cacheDir, 'pages.sqlite'))
+    sportsref.ratelimit.configure(lockFile=os.path.join(cacheDir,
+                                                        'ratelimit'))
+    sportsref.decorators.clearMemoized()
+    return cacheDir
+
+def removeCaches():
+    """Deletes every temporary cache directory made by the tests."""
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+def fixturePath(name):
+    """Returns the path of a file in tests/fixtures."""
+    return os.path.join(FIXTURES, name)
+
+def assertFramesIdentical(got, expected):
+    """Asserts that two DataFrames have the same columns (in order), index,
+    dtypes and values. Stricter than pandas' assert_frame_equal: None and NaN
+    are told apart, as are values of different types (e.g., 1 and True).
+    """
+    assert list(got.columns) == list(expected.columns), \
+        (list(got.columns), list(expected.columns))
+    assert got.index.equals(expected.index), (got.index, expected.index)
+    for col in expected.columns:
+        assert got[col].dtype == expected[col].dtype, \
+            (col, got[col].dtype, expected[col].dtype)
+        for i, (x, y) in enumerate(zip(got[col].values,
+                                       expected[col].values)):
+            assert (x is None, pd.isnull(x)) == (y is None, pd.isnull(y)), \
+                (col, i, x, y)
+            if pd.notnull(x):
+                assert x == y, (col, i, x, y)
+                assert (isinstance(x, (bool, np.bool_)) ==
+                        isinstance(y, (bool, np.bool_))), (col, i, x, y)
+
+def sitePages():
+    """Maps the path of each page in tests/fixtures/site to its file; a
+    directory's index.htm is served at the directory's path.
+
+    :returns: A dict of URL path -> file path.
+    """
+    siteDir = fixturePath('site')
+    pages = {}
+    for dirpath, _, filenames in os.walk(siteDir):
+        for fn in filenames:
+            path = os.path.join(dirpath, fn)
+            urlPath = '/' + os.path.relpath(path, siteDir).replace(os.sep, '/')
+            if fn == 'index.htm':
+                urlPath = urlPath[:-len('index.htm')]
+            pages[urlPath] = path
+    return pages
+
+class _ThreadingHTTPServer(SocketServer.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, clientAddress):
+        # a client that timed out hangs up before the response is written
+        if not isinstance(sys.exc_info()[1], socket.error):
+            BaseHTTPServer.HTTPServer.handle_error(self, request,
+                                                   clientAddress)
+
+class FixtureServer(object):
+
+    """A local HTTP server that serves fixture pages and counts how many
+    times each path was requested (`statuses` lists the status codes sent for
+    each path). Pages carry an ETag, and a matching If-None-Match gets a 304.
+    Use it as a context manager; while it runs, sportsref.pfr.BASE_URL points
+    at it.
+    """
+
+    def __init__(self, pages=None, delay=0.):
+        self.pages = sitePages() if pages is None else pages
+        self.delay = delay
+        self.counts = collections.Counter()
+        self.statuses = collections.defaultdict(list)
+        self._lock = threading.Lock()
+        self._server = None
+        self._origBaseURL = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # headers and body go out in separate writes; without this, a
+            # keep-alive client waits on a delayed ACK for each response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.counts[self.path] += 1
+                if server.delay:
+                    time.sleep(server.delay)
+                fn = server.pages.get(self.path)
+                etag = None
+                if fn is None:
+                    body, status = 'not found', 404
+                else:
+                    with open(fn, 'rb') as f:
+                        body, status = f.read(), 200
+                    etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+                    if self.headers.get('If-None-Match') == etag:
+                        body, status = '', 304
+                with server._lock:
+                    server.statuses[self.path].append(status)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def baseURL(self):
+        return 'http://127.0.0.1:{}'.format(self._server.server_address[1])
+
+    def __enter__(self):
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self._origBaseURL = sportsref.pfr.BASE_URL
+        sportsref.pfr.BASE_URL = self.baseURL
+        return self
+
+    def __exit__(self, *excInfo):
+        sportsref.pfr.BASE_URL = self._origBaseURL
+        # drop the session's keep-alive connections to the server
+        sportsref.session.configure()
+        self._server.shutdown()
+        self._server.server_close()
+
+resetCache()
@@ -0,0 +1,86 @@
+import unittest
+
+from tests import support
+
+import sportsref
+from sportsref.pfr import boxscores
+
+# Cincinnati at Baltimore, whose stats tables list the teams as 'BAL' and
+# 'CIN' even though Baltimore's team ID is 'rav'
+BS_ID = '201409070rav'
+
+class PlayerTeamsTest(unittest.TestCase):
+
+    def setUp(self):
+        support.resetCache()
+        self.server = support.FixtureServer()
+        self.server.__enter__()
+        self.bs = boxscores.BoxScore(BS_ID)
+
+    def tearDown(self):
+        # the BoxScore's URL points at this test's server
+        del self.bs
+        self.server.__exit__(None, None, None)
+        support.resetCache()
+
+    def test_abbreviations(self):
+        self.assertEqual((self.bs.home(), self.bs.away()), ('rav', 'cin'))
+        teams = self.bs.playerTeams()
+        self.assertEqual(set(teams.values()), {'rav', 'cin'})
+        # neither kicker nor Forsett started, so they come from the stats
+        self.assertEqual(teams['TuckJu00'], 'rav')
+        self.assertEqual(teams['ForsJu00'], 'rav')
+        self.assertEqual(teams['NugeMi00'], 'cin')
+
+    def test_player_stats_types(self):
+        stats = self.bs.playerStats()
+        self.assertEqual(stats.team.dtype, 'category')
+        self.assertEqual(stats.player.dtype, 'category')
+        self.assertEqual(sorted(stats.team.cat.categories), ['bal', 'cin'])
+
+    def test_starters(self):
+        teams = self.bs.playerTeams()
+        for pID, team in zip(self.bs.starters().playerID,
+                             self.bs.starters().team):
+            self.assertEqual(teams[pID], team)
+
+    def test_unmatched(self):
+        self.assertEqual(self.bs.abbreviationTeams(['bal', 'cin', 'xyz']),
+                         {'bal': 'rav', 'cin': 'cin'})
+
+    def test_pbp(self):
+        df = self.bs.pbp()
+        self.assertEqual(tuple(df.loc[0, ['team', 'opp']]), ('rav', 'cin'))
+        self.assertEqual(set(df.team) | set(df.opp), {'rav', 'cin'})
+        self.assertTrue((df.team != df.opp).all())
+        # every team came from the boxscore, not from a player's gamelog
+        self.assertEqual(
+            [p for p in self.server.counts if p.startswith('/players/')], []
+        )
+
+class AbbrMatchesTest(unittest.TestCase):
+
+    def test_matches(self):
+        for abbr, teamID, name in [
+            ('bal', 'rav', 'Baltimore Ravens'),
+            ('ind', 'clt', 'Indianapolis Colts'),
+            ('hou', 'htx', 'Houston Texans'),
+            ('ten', 'oti', 'Tennessee Titans'),
+            ('ari', 'crd', 'Arizona Cardinals'),
+            ('oak', 'rai', 'Oakland Raiders'),
+            ('gnb', 'gnb', 'Green Bay Packers'),
+            ('sfo', 'sfo', 'San Francisco 49ers'),
+        ]:
+            self.assertTrue(boxscores._abbrMatches(abbr, teamID, name), abbr)
+
+    def test_mismatches(self):
+        for abbr, teamID, name in [
+            ('bal', 'cin', 'Cincinnati Bengals'),
+            ('cin', 'rav', 'Baltimore Ravens'),
+            ('nyj', 'nyg', 'New York Giants'),
+            ('nor', 'nwe', 'New England Patriots'),
+        ]:
+            self.assertFalse(boxscores._abbrMatches(abbr, teamID, name), abbr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,357 @@
+import StringIO
+import os
+import re
+import sqlite3
+import sys
+import time
+import unittest
+
+from tests import support
+
+from pyquery import PyQuery as pq
+
+import sportsref
+from sportsref import cache
+
+def noisy(html):
+    """Adds the kinds of markup that minify strips (scripts, styles,
+    comments, iframes, link tags) throughout a fixture page, including a
+    commented-out copy of each of its tables and comments inside cells.
+    """
+    tables = re.findall(r'<table\b.*?</table>', html, re.DOTALL)
+    head = ('<link rel="stylesheet" href="/css/sr.css">\n'
+            '<style type="text/css">table { color: red; }</style>\n'
+            '<script>var s = "<table id=\\"fake\\"></table> <!-- -->";'
+            '</script>\n')
+    body = ('<noscript><iframe src="/ads"></iframe></noscript>\n'
+            '<!-- <script>ignored()</script> -->\n'
+            '<div id="ad"><iframe src="/ads/2"><p>x</p></iframe></div>\n')
+    html = html.replace('</head>', head + '</head>', 1)
+    html = html.replace('<body>', '<body>\n' + body, 1)
+    html = html.replace('</body>', ''.join(
+        '<!--\n{}\n-->\n'.format(t) for t in tables
+    ) + '<script src="/js/sr.js"></script>\n</body>', 1)
+    html = html.replace('<td data-stat="detail">',
+                        '<td data-stat="detail"><!-- play -->')
+    html = html.replace('</tr>', '<script>row()</script></tr>')
+    return html
+
+class CodecTest(unittest.TestCase):
+
+    URL = '/boxscores/201409070nwe.htm'
+
+    def setUp(self):
+        support.resetCache()
+        self.store = cache.getStore()
+        with open(support.fixturePath('site' + self.URL), 'rb') as f:
+            self.html = f.read()
+
+    def tearDown(self):
+        support.resetCache()
+
+    def putBlob(self, url, blob):
+        with self.store._conn() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO pages (url, body, fetched, size) '
+                'VALUES (?, ?, 0, ?)', (url, sqlite3.Binary(blob), len(blob))
+            )
+
+    def test_round_trip(self):
+        blob = cache.compress(self.html, 'zlib')
+        self.assertTrue(blob.startswith(cache.MARKER + 'zlib\n'))
+        self.assertLess(len(blob), len(self.html))
+        self.assertEqual(cache.decompress(blob), self.html)
+        # uncompressed entries from older versions read as they are
+        self.assertEqual(cache.decompress(self.html), self.html)
+
+    def test_undecodable(self):
+        self.putBlob('a', cache.MARKER + 'zlib\nnot zlib at all')
+        self.putBlob('b', cache.MARKER + 'lzma\n' + self.html)
+        self.assertIsNone(self.store.get('a'))
+        self.assertIsNone(self.store.get('b'))
+
+    def test_missing_zstandard(self):
+        zstd = cache.zstd
+        cache.zstd = None
+        try:
+            with support.FixtureServer() as server:
+                url = server.baseURL + self.URL
+                self.putBlob(url, cache.MARKER + 'zstd\n\x28\xb5\x2f\xfd')
+                self.assertIsNone(self.store.get(url))
+                # the page is fetched again and replaces the entry
+                self.assertEqual(sportsref.utils.getHTML(url),
+                                 self.html.decode('utf-8'))
+                self.assertEqual(server.counts[self.URL], 1)
+                self.assertEqual(self.store.get(url).text, self.html)
+        finally:
+            cache.zstd = zstd
+
+class MinifyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cacheDir = support.resetCache()
+        self.pages = {}
+        for path, fn in support.sitePages().items():
+            with open(fn, 'rb') as f:
+                self.pages[path] = f.read()
+
+    def tearDown(self):
+        cache.configure(minify=False)
+        support.resetCache()
+
+    def tables(self, html):
+        doc = pq(html.decode('utf-8'), parser='html')
+        return {table.attr['id']: sportsref.utils.parseTable(table)
+                for table in doc('table[id]').items()}
+
+    def test_fixture_tables(self):
+        for path, html in sorted(self.pages.items()):
+            page = noisy(html)
+            small = cache.minify(page)
+            self.assertNotIn('<script', small)
+            self.assertNotIn('<!--', small)
+            self.assertEqual(cache.minify(html), html)
+            expected = self.tables(page)
+            got = self.tables(small)
+            self.assertEqual(sorted(got), sorted(expected))
+            self.assertGreater(len(got), 0)
+            for tableID, df in expected.iteritems():
+                try:
+                    support.assertFramesIdentical(got[tableID], df)
+                    # as getTable extracts it, without parsing the page
+                    fragment = sportsref.utils.tableHTML(small, tableID)
+                    self.assertEqual(
+                        fragment,
+                        sportsref.utils.tableHTML(page, tableID).replace(
+                            '<!-- play -->', ''
+                        ).replace('<script>row()</script>', '')
+                    )
+                except AssertionError as e:
+                    raise AssertionError('{}#{}: {}'.format(path, tableID, e))
+
+    def boxScores(self, minify):
+        cache.configure(minify=minify)
+        support.resetCache()
+        pages = {}
+        for path, html in self.pages.items():
+            fn = os.path.join(self.cacheDir, path.replace('/', '_') + '.htm')
+            with open(fn, 'wb') as f:
+                f.write(noisy(html))
+            pages[path] = fn
+        results = {}
+        with support.FixtureServer(pages) as server:
+            for bsID in ('201409070nwe', '201409070rav'):
+                bs = sportsref.pfr.boxscores.BoxScore(bsID)
+                results[bsID] = (
+                    (bs.date(), bs.week(), bs.season(), bs.home(), bs.away(),
+                     bs.homeScore(), bs.awayScore(), bs.playerTeams()),
+                    bs.starters(), bs.playerStats(), bs.pbp()
+                )
+                stored = cache.getStore().get(bs.mainURL).text
+                self.assertEqual('<script' in stored, not minify)
+                del bs
+        return results
+
+    def test_boxscores(self):
+        expected = self.boxScores(minify=False)
+        got = self.boxScores(minify=True)
+        for bsID, (values, starters, stats, plays) in expected.items():
+            self.assertEqual(got[bsID][0], values)
+            for i, df in ((1, starters), (2, stats), (3, plays)):
+                support.assertFramesIdentical(got[bsID][i], df)
+
+class PruneTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cacheDir = support.resetCache()
+        self.path = os.path.join(self.cacheDir, 'prune.sqlite')
+        self.store = cache.SQLiteStore(self.path)
+        # page i is i kB of HTML, last accessed i hours ago
+        now = time.time()
+        for i in range(1, 11):
+            url = 'page{}'.format(i)
+            self.store.put(url, os.urandom(1000 * i))
+            self.setAccessed(url, now - 3600 * i)
+
+    def tearDown(self):
+        support.resetCache()
+
+    def setAccessed(self, url, accessed):
+        with self.store._conn() as conn:
+            conn.execute('UPDATE pages SET accessed = ? WHERE url = ?',
+                         (accessed, url))
+
+    def urls(self):
+        return sorted(self.store.urls(), key=lambda url: int(url[4:]))
+
+    def test_max_entries(self):
+        self.assertEqual(self.store.prune(maxEntries=3), 7)
+        self.assertEqual(self.urls(), ['page1', 'page2', 'page3'])
+
+    def test_max_bytes(self):
+        # pages 1-4 take 10 kB (plus a few bytes of zlib overhead)
+        self.assertEqual(self.store.prune(maxBytes=10100), 6)
+        self.assertEqual(self.urls(), ['page1', 'page2', 'page3', 'page4'])
+        self.assertLessEqual(self.store.stats()['bytes'], 10100)
+
+    def test_get_marks_access(self):
+        self.assertIsNotNone(self.store.get('page10'))
+        self.store.prune(maxEntries=2)
+        self.assertEqual(self.urls(), ['page1', 'page10'])
+
+    def test_store_caps(self):
+        prune = cache.PRUNE_EVERY
+        cache.PRUNE_EVERY = 5
+        try:
+            store = cache.SQLiteStore(self.path, maxEntries=4)
+            for i in range(11, 16):
+                store.put('page{}'.format(i), 'new')
+            self.assertEqual(self.urls(),
+                             ['page12', 'page13', 'page14', 'page15'])
+        finally:
+            cache.PRUNE_EVERY = prune
+
+    def test_drops_tables(self):
+        self.store.putTable('page10', 'table', 'v', {'a': 1})
+        self.store.prune(maxEntries=3)
+        self.assertEqual(self.store.getTable('page10', 'table', 'v'),
+                         (None, None))
+        self.assertEqual(
+            self.store._conn().execute('SELECT count(*) FROM tables')
+            .fetchone()[0], 0
+        )
+
+    def runMain(self, *argv):
+        stdout = sys.stdout
+        sys.stdout = out = StringIO.StringIO()
+        try:
+            cache.main(['--path', self.path] + list(argv))
+        finally:
+            sys.stdout = stdout
+        return out.getvalue()
+
+    def test_cli(self):
+        out = self.runMain('stats')
+        self.assertIn('Entries:   10', out)
+        out = self.runMain('prune', '--max-entries', '4', '--vacuum')
+        self.assertIn('Evicted 6 pages', out)
+        self.assertIn('Entries:   4', out)
+        self.assertEqual(len(self.store.urls()), 4)
+
+class MigrateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(support.resetCache(), 'old.sqlite')
+
+    def tearDown(self):
+        support.resetCache()
+
+    def test_accessed(self):
+        # the schema before pages had access times, sizes or minification
+        conn = sqlite3.connect(self.path)
+        with conn:
+            conn.execute('CREATE TABLE pages (url TEXT PRIMARY KEY, '
+                         'body BLOB NOT NULL, etag TEXT, last_modified TEXT, '
+                         'fetched REAL NOT NULL)')
+            for i, body in enumerate(['a' * 10, 'b' * 20, 'c' * 30]):
+                conn.execute('INSERT INTO pages (url, body, fetched) '
+                             'VALUES (?, ?, ?)', ('page%d' % i, body, 100 * i))
+        conn.close()
+
+        store = cache.SQLiteStore(self.path)
+        rows = store._conn().execute(
+            'SELECT url, accessed, size, minified FROM pages ORDER BY url'
+        ).fetchall()
+        self.assertEqual(rows, [('page0', 0, 10, 0), ('page1', 100, 20, 0),
+                                ('page2', 200, 30, 0)])
+        self.assertEqual(store.get('page1').text, 'b' * 20)
+        # page1 was just read, so it outlives the others
+        store.prune(maxEntries=1)
+        self.assertEqual(store.urls(), ['page1'])
+
+class TableCacheTest(unittest.TestCase):
+
+    PATH = '/teams/'
+    SELECTOR = '#teams_active'
+
+    def setUp(self):
+        support.resetCache()
+        self.store = cache.getStore()
+        self.server = support.FixtureServer()
+        self.server.__enter__()
+        self.url = self.server.baseURL + self.PATH
+        self.parses = 0
+        self.parseTable = sportsref.utils.parseTable
+        sportsref.utils.parseTable = self.countingParse
+
+    def tearDown(self):
+        sportsref.utils.parseTable = self.parseTable
+        self.server.__exit__(None, None, None)
+        support.resetCache()
+
+    def countingParse(self, table):
+        self.parses += 1
+        return self.parseTable(table)
+
+    def getTable(self):
+        # as if in a new process: nothing memoized, only the page cache
+        sportsref.decorators.clearMemoized()
+        return sportsref.utils.getTable(self.url, self.SELECTOR)
+
+    def storedTable(self):
+        return self.store.getTable(self.url, self.SELECTOR,
+                                   sportsref.utils.parserVersion())[0]
+
+    def test_warm_load(self):
+        df = self.getTable()
+        self.assertEqual(self.parses, 1)
+        support.assertFramesIdentical(self.getTable(), df)
+        self.assertEqual(self.parses, 1)
+        self.assertEqual(self.server.counts[self.PATH], 1)
+
+    def test_parser_version(self):
+        self.getTable()
+        version = sportsref.utils.PARSER_VERSION
+        sportsref.utils.PARSER_VERSION += 1
+        sportsref.decorators.clearMemoized()
+        try:
+            self.assertIsNone(self.storedTable())
+            self.getTable()
+            self.assertEqual(self.parses, 2)
+        finally:
+            sportsref.utils.PARSER_VERSION = version
+            sportsref.decorators.clearMemoized()
+        # the page itself was still cached
+        self.assertEqual(self.server.counts[self.PATH], 1)
+
+    def test_put_and_delete(self):
+        self.getTable()
+        entry = self.store.get(self.url)
+        self.store.put(self.url, entry.text)
+        self.assertIsNone(self.storedTable())
+
+        self.getTable()
+        self.assertIsNotNone(self.storedTable())
+        self.store.delete(self.url)
+        self.assertIsNone(self.storedTable())
+        self.getTable()
+        self.assertEqual(self.parses, 3)
+
+    def test_prune(self):
+        self.getTable()
+        self.store.prune(maxEntries=0)
+        self.assertIsNone(self.storedTable())
+
+    def test_not_modified(self):
+        df = self.getTable()
+        # the page (and so the table) goes stale
+        self.store.touch(self.url, fetched=0)
+        support.assertFramesIdentical(self.getTable(), df)
+        self.assertEqual(self.server.statuses[self.PATH], [200, 304])
+        self.assertEqual(self.parses, 1)
+        _, fetched = self.store.getTable(self.url, self.SELECTOR,
+                                         sportsref.utils.parserVersion())
+        self.assertTrue(sportsref.freshness.isFresh(self.url, fetched))
+
+if __name__ == '__main__':
+    unittest.main()
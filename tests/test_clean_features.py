@@ -0,0 +1,119 @@
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+from pyquery import PyQuery as pq
+
+from tests import support
+from tests.test_play_details import loadCorpus
+
+import sportsref
+from sportsref.pfr import pbp
+
+def samplePlays(details, seed=22, compact=False):
+    """Builds a play-by-play table around the given detail strings, with the
+    other columns filled in at random (but reproducibly).
+
+    :details: A list of detail strings.
+    :seed: The random seed.
+    :compact: If True, give the columns the compact types that
+    sportsref.utils.compactTypes gives to parsed tables.
+    :returns: A DataFrame like the play-by-play table of a boxscore.
+    """
+    rnd = random.Random(seed)
+    n = len(details)
+    pick = lambda *values: [rnd.choice(values) for _ in range(n)]
+    df = pd.DataFrame({
+        'quarter': pick('1', '2', '3', '4', 'OT'),
+        'qtr_time_remain': pick('12:34', None, '0:05', '15:00'),
+        'down': pick(1, 2, 3, 4, np.nan),
+        'yds_to_go': pick(10, 5, 1),
+        'location': pick('NWE 35', 'MIA 20', '50', None, ' MIA 3 ', ''),
+        'detail': details,
+        'pbp_score_aw': [float(rnd.randint(0, 30)) for _ in range(n)],
+        'pbp_score_hm': [rnd.randint(0, 30) for _ in range(n)],
+        'exp_pts_before': [rnd.choice([rnd.random(), np.nan])
+                           for _ in range(n)],
+        'exp_pts_after': [str(rnd.random()) for _ in range(n)],
+        'home_wp': [rnd.random() * 100 for _ in range(n)],
+        'team': pick('nwe', 'mia'),
+        'hasClass_pos_change': pick(True, False),
+    })
+    if compact:
+        df['quarter'] = df.quarter.replace('OT', '4').astype(np.int8)
+        df['down'] = df.down.astype(np.float32)
+        df['yds_to_go'] = df.yds_to_go.astype(np.int8)
+        df['pbp_score_hm'] = df.pbp_score_hm.astype(np.int16)
+        df['team'] = df.team.astype('category')
+    return df
+
+def fixturePlays():
+    """Parses the play-by-play table of the fixture boxscore, compact column
+    types and all.
+    """
+    with open(support.fixturePath('site/boxscores/201409070nwe.htm')) as f:
+        doc = pq(f.read().decode('utf-8'))
+    return sportsref.utils.parseTable(doc('table#pbp_data'))
+
+def preCleaned(df):
+    """Runs expandDetails up to its cleaning step.
+
+    :returns: The DataFrame that expandDetails hands to cleanFeaturesFrame.
+    """
+    captured = []
+    orig = pbp.cleanFeaturesFrame
+    pbp.cleanFeaturesFrame = lambda frame: captured.append(frame) or frame
+    try:
+        pbp.expandDetails(df)
+    finally:
+        pbp.cleanFeaturesFrame = orig
+    return captured[0]
+
+def cleanRowWise(df):
+    """The cleaning step as it was before it went column-wise."""
+    return df.apply(pbp.cleanFeatures, axis=1)
+
+class CleanFeaturesFrameTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # timeoutTeam is mapped with teams.teamIDs(), i.e., the /teams/ page
+        support.resetCache()
+        cls.server = support.FixtureServer()
+        cls.server.__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.__exit__(None, None, None)
+        support.resetCache()
+
+    def check(self, df):
+        pre = preCleaned(df)
+        support.assertFramesIdentical(pbp.cleanFeaturesFrame(pre),
+                                      cleanRowWise(pre))
+
+    def test_fixture_game(self):
+        plays = fixturePlays()
+        self.assertEqual(plays['quarter'].dtype, np.int8)
+        self.check(plays)
+
+    def test_corpus(self):
+        details = [d for d, _ in loadCorpus()]
+        for compact in (False, True):
+            self.check(samplePlays(details, compact=compact))
+            self.check(samplePlays(details * 3 + [None], seed=7,
+                                   compact=compact))
+
+    def test_small_frames(self):
+        details = [d for d, _ in loadCorpus()]
+        rnd = random.Random(5)
+        for size in (1, 2, 7):
+            for compact in (False, True):
+                sample = rnd.sample(details, size)
+                # the row-wise version needs these columns to exist
+                sample[0] = 'Penalty on NWE: Delay of Game, 5 yards'
+                self.check(samplePlays(sample, seed=size, compact=compact))
+
+if __name__ == '__main__':
+    unittest.main()
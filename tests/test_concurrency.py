@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import unittest
+from multiprocessing.pool import ThreadPool
+
+import pandas as pd
+
+from tests import support
+
+import sportsref
+
+# the fixture game, served under several boxscore IDs
+BS_IDS = ['201409070nwe', '201409140nwe', '201409210nwe', '201409280nwe']
+NUM_CALLS = 200
+NUM_THREADS = 32
+
+def _pages():
+    pages = support.sitePages()
+    fixture = pages['/boxscores/201409070nwe.htm']
+    for bsID in BS_IDS:
+        pages['/boxscores/{}.htm'.format(bsID)] = fixture
+    return pages
+
+def _pbp(bsID):
+    return sportsref.pfr.boxscores.BoxScore(bsID).pbp()
+
+class ConcurrencyTest(unittest.TestCase):
+
+    def setUp(self):
+        support.resetCache()
+        self.rate = sportsref.ratelimit.RATE
+        self.burst = sportsref.ratelimit.BURST
+        sportsref.ratelimit.configure(rate=1000., burst=1000)
+
+    def tearDown(self):
+        sportsref.ratelimit.configure(rate=self.rate, burst=self.burst)
+        support.resetCache()
+
+    def checkCache(self, server):
+        store = sportsref.cache.getStore()
+        conn = store._conn()
+        self.assertEqual(conn.execute('PRAGMA integrity_check').fetchone()[0],
+                         'ok')
+        for path in server.counts:
+            entry = store.get(server.baseURL + path)
+            self.assertIsNotNone(entry, path)
+            with open(server.pages[path], 'rb') as f:
+                expected = f.read().decode('utf-8')
+            self.assertEqual(entry.text, expected, path)
+
+    def test_threads(self):
+        with support.FixtureServer(_pages(), delay=.05) as server:
+            # keep the BoxScores alive, so that all threads share each game's
+            # instance (and race to fill its method caches)
+            boxScores = [sportsref.pfr.boxscores.BoxScore(bsID)
+                         for bsID in BS_IDS]
+            pool = ThreadPool(NUM_THREADS)
+            try:
+                bsIDs = [BS_IDS[i % len(BS_IDS)] for i in range(NUM_CALLS)]
+                results = pool.map(_pbp, bsIDs)
+            finally:
+                pool.close()
+
+            # every page was downloaded exactly once
+            expectedPaths = ['/teams/'] + [
+                '/boxscores/{}.htm'.format(bsID) for bsID in BS_IDS
+            ]
+            self.assertEqual(sorted(server.counts), sorted(expectedPaths))
+            self.assertEqual(set(server.counts.values()), {1})
+
+            # every call for a game got the same plays
+            first = {}
+            for bsID, df in zip(bsIDs, results):
+                self.assertEqual(len(df), 25)
+                if bsID in first:
+                    pd.testing.assert_frame_equal(df, first[bsID])
+                else:
+                    first[bsID] = df
+
+            self.checkCache(server)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+    def test_processes(self):
+        with support.FixtureServer(_pages(), delay=.05) as server:
+            # warm up the memoization caches in the parent, as forked workers
+            # inherit them (and the locks protecting them)
+            expected = _pbp(BS_IDS[0])
+            support.resetCache()
+            pool = multiprocessing.Pool(4)
+            try:
+                results = pool.map(_pbp, BS_IDS * 4)
+            finally:
+                pool.close()
+                pool.join()
+
+            # the games only differ in their IDs
+            expected = expected.drop('bsID', axis=1)
+            for df in results:
+                pd.testing.assert_frame_equal(df.drop('bsID', axis=1),
+                                              expected)
+            # processes don't share in-flight requests, but they share the
+            # page cache
+            self.assertTrue(all(server.counts.values()))
+            self.checkCache(server)
+
+if __name__ == '__main__':
+    unittest.main()
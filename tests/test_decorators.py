@@ -0,0 +1,118 @@
+import time
+import unittest
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+import pandas as pd
+
+from tests import support
+
+from sportsref import decorators
+
+class FieldsKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        @decorators.memoized(key=decorators.fieldsKey(['a', 'b']))
+        def func(struct, x=None):
+            self.calls.append(struct)
+            return struct['a']
+
+        self.func = func
+
+    def test_missing_values(self):
+        # distinct NaN objects, as in the rows of a DataFrame
+        nan1, nan2 = float('nan'), float('nan')
+        self.assertIsNot(nan1, nan2)
+        self.assertEqual(self.func({'a': 'x', 'b': nan1}), 'x')
+        self.assertEqual(self.func({'a': 'x', 'b': nan2}), 'x')
+        self.assertEqual(self.func({'a': 'x', 'b': None}), 'x')
+        self.assertEqual(self.func({'a': 'x'}), 'x')
+        row = pd.Series({'a': 'x', 'b': np.float32('nan')})
+        self.assertEqual(self.func(row), 'x')
+        self.assertEqual(self.func({'a': 'x', 'b': nan1}, x=np.nan), 'x')
+        self.assertEqual(self.func({'a': 'x', 'b': nan2}, x=None), 'x')
+        info = self.func.cache_info()
+        self.assertEqual((info.misses, info.currsize), (2, 2))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_frame_rows(self):
+        df = pd.DataFrame({'a': ['x', 'y'] * 50,
+                           'b': [np.nan, 'p'] * 50,
+                           'c': np.arange(100.)})
+        for row in df.to_dict('records'):
+            self.func(row)
+        self.assertEqual(self.func.cache_info().currsize, 2)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_other_fields_ignored(self):
+        self.func({'a': 'x', 'b': 1, 'c': 2})
+        self.func({'a': 'x', 'b': 1, 'c': 3})
+        self.assertEqual(len(self.calls), 1)
+        self.func({'a': 'x', 'b': 2, 'c': 3})
+        self.assertEqual(len(self.calls), 2)
+
+class CacheGetPutTest(unittest.TestCase):
+
+    def test_get_put(self):
+        calls = []
+
+        @decorators.memoized(maxsize=3)
+        def double(x):
+            calls.append(x)
+            return 2 * x
+
+        self.assertEqual(double(1), 2)
+        self.assertEqual(double.cache_get_many([(1,), (2,)]), {(1,): 2})
+        double.cache_put_many([((2,), 5), ((3,), None)])
+        self.assertEqual(double(2), 5)
+        self.assertEqual(double.cache_get_many([(3,)]), {(3,): None})
+        self.assertEqual(calls, [1])
+        # puts count toward the size cap like any other entry
+        double.cache_put_many([((4,), 8)])
+        self.assertEqual(double.cache_info().currsize, 3)
+        self.assertEqual(double.cache_get_many([(1,), (2,), (3,), (4,)]),
+                         {(2,): 5, (3,): None, (4,): 8})
+
+class MemoizedMethodTest(unittest.TestCase):
+
+    class Thing(object):
+
+        def __init__(self):
+            self.calls = []
+
+        @decorators.memoizedMethod
+        def slow(self, x=1):
+            self.calls.append(('slow', x))
+            time.sleep(0.05)
+            return [x]
+
+        @decorators.memoizedMethod
+        def outer(self):
+            self.calls.append(('outer',))
+            return self.slow() + self.slow(2)
+
+    def test_threads(self):
+        thing = self.Thing()
+        pool = ThreadPool(16)
+        try:
+            results = pool.map(lambda i: thing.outer() if i % 2 else
+                               thing.slow(), range(64))
+        finally:
+            pool.close()
+        self.assertEqual(sorted(thing.calls),
+                         [('outer',), ('slow', 1), ('slow', 2)])
+        # every thread got the very same cached object
+        slow = [r for r in results if len(r) == 1]
+        self.assertTrue(all(r is slow[0] for r in slow))
+
+    def test_instances(self):
+        things = [self.Thing(), self.Thing()]
+        for thing in things:
+            self.assertEqual(thing.outer(), [1, 2])
+            self.assertEqual(thing.outer(), [1, 2])
+            self.assertEqual(len(thing.calls), 3)
+
+if __name__ == '__main__':
+    unittest.main()
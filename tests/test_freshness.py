@@ -0,0 +1,65 @@
+import datetime
+import time
+import unittest
+
+from tests import support
+
+import sportsref
+from sportsref import freshness
+
+def _ts(*args):
+    return time.mktime(datetime.datetime(*args).timetuple())
+
+class ClassifyTest(unittest.TestCase):
+
+    def test_classes(self):
+        base = sportsref.pfr.BASE_URL
+        cases = [
+            ('/boxscores/201409070nwe.htm', ('boxscore', None)),
+            ('/players/B/BradTo00.htm', ('player', None)),
+            ('/players/B/BradTo00/gamelog/2014/', ('player', 2014)),
+            ('/players/B/BradTo00/gamelog/', ('player', None)),
+            ('/teams/nwe/', ('team', None)),
+            ('/teams/nwe/2014.htm', ('teamSeason', 2014)),
+            ('/teams/nwe/2014_roster.htm', ('teamSeason', 2014)),
+            ('/years/2014/', ('season', 2014)),
+            ('/years/2014/games.htm', ('season', 2014)),
+            ('/play-index/play_finder.cgi', ('constants', None)),
+            ('/play-index/play_finder.cgi?year_min=2014', ('finder', None)),
+        ]
+        for url, expected in cases:
+            self.assertEqual(freshness.classify(base + url), expected, url)
+
+class IsFreshTest(unittest.TestCase):
+
+    # a Wednesday during the 2016 season; the last update was on Tuesday
+    NOW = _ts(2016, 11, 16, 12)
+
+    def fresh(self, url, fetched):
+        return freshness.isFresh(sportsref.pfr.BASE_URL + url, fetched,
+                                 now=self.NOW)
+
+    def test_past_seasons_are_fresh_forever(self):
+        longAgo = _ts(2015, 1, 1)
+        for url in ('/years/2014/', '/years/2015/games.htm',
+                    '/players/B/BradTo00/gamelog/2014/',
+                    '/teams/nwe/2015.htm', '/teams/nwe/2015_roster.htm',
+                    '/boxscores/201409070nwe.htm'):
+            self.assertTrue(self.fresh(url, longAgo), url)
+
+    def test_current_season_goes_stale_after_update(self):
+        beforeUpdate = _ts(2016, 11, 14, 12)
+        afterUpdate = _ts(2016, 11, 15, 12)
+        for url in ('/years/2016/', '/players/B/BradTo00/gamelog/2016/',
+                    '/players/B/BradTo00.htm', '/teams/nwe/2016.htm',
+                    '/play-index/play_finder.cgi?year_min=2014'):
+            self.assertFalse(self.fresh(url, beforeUpdate), url)
+            self.assertTrue(self.fresh(url, afterUpdate), url)
+
+    def test_offseason_is_fresh(self):
+        now = _ts(2016, 6, 1)
+        url = sportsref.pfr.BASE_URL + '/years/2016/'
+        self.assertTrue(freshness.isFresh(url, _ts(2016, 2, 1), now=now))
+
+if __name__ == '__main__':
+    unittest.main()
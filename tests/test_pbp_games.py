@@ -0,0 +1,217 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from tests import support
+
+import sportsref
+from sportsref.pfr import pbp
+
+GAMES = {
+    'g1': {'home': 'nwe', 'away': 'mia', 'line': -7., 'winner': 'nwe'},
+    'g2': {'home': 'buf', 'away': 'nyj', 'line': 3., 'winner': np.nan},
+}
+
+class FakeBoxScore(object):
+
+    """Stands in for BoxScore; counts how many instances get built."""
+
+    built = []
+
+    def __init__(self, bsID):
+        self.bsID = bsID
+        self.built.append(bsID)
+
+    def home(self):
+        return GAMES[self.bsID]['home']
+
+    def away(self):
+        return GAMES[self.bsID]['away']
+
+    def line(self):
+        return GAMES[self.bsID]['line']
+
+    def winner(self):
+        return GAMES[self.bsID]['winner']
+
+def makePlays(bsID, n=6):
+    home, away = GAMES[bsID]['home'], GAMES[bsID]['away']
+    return pd.DataFrame({
+        'bsID': bsID,
+        'home': home,
+        'away': away,
+        'team': [home, away] * (n // 2),
+        'detail': ['play {}'.format(i) for i in range(n)],
+        'fieldSide': [home, away, np.nan] * (n // 3),
+        'ydLine': np.arange(n) * 10 + 5,
+        'isXP': False,
+        'isTwoPoint': False,
+        'isKickoff': [True] + [False] * (n - 1),
+        'isTimeout': [False] * (n - 2) + [True, False],
+        'secsElapsed': np.arange(n) * 100,
+        'home_wp': np.linspace(50., 80., n),
+        'pbp_score_hm': [0] * (n // 2) + [7] * (n - n // 2),
+        'pbp_score_aw': 0,
+    })
+
+class GameFrameTest(unittest.TestCase):
+
+    def setUp(self):
+        self.orig = sportsref.pfr.boxscores.BoxScore
+        del FakeBoxScore.built[:]
+        sportsref.pfr.boxscores.BoxScore = \
+            sportsref.decorators.weakMemoized(FakeBoxScore)
+
+    def tearDown(self):
+        sportsref.pfr.boxscores.BoxScore = self.orig
+
+    def test_one_box_score_per_game(self):
+        df = pd.concat([makePlays('g1'), makePlays('g2')], ignore_index=True)
+        df = pbp.addWPAColumns(df)
+        df = pbp.addTeamFeaturesFrame(df)
+        self.assertEqual(sorted(FakeBoxScore.built), ['g1', 'g1', 'g2', 'g2'])
+
+        # given the games up front, no more BoxScores are built
+        del FakeBoxScore.built[:]
+        boxScores = pbp.boxScoresFor(df['bsID'])
+        pbp.addWPAColumns(df, boxScores)
+        pbp.addTeamFeaturesFrame(df, boxScores)
+        self.assertEqual(sorted(FakeBoxScore.built), ['g1', 'g2'])
+
+    def test_games_are_independent(self):
+        g1, g2 = makePlays('g1'), makePlays('g2')
+        both = pd.concat([g1, g2], ignore_index=True)
+        combined = pbp.addTeamFeaturesFrame(pbp.addWPAColumns(both))
+        separate = pd.concat(
+            [pbp.addTeamFeaturesFrame(pbp.addWPAColumns(g)) for g in (g1, g2)],
+            ignore_index=True
+        )
+        pd.testing.assert_frame_equal(combined, separate)
+        # g2 is a tie, so its last play takes the home team's WP to 50%
+        last = combined[combined.bsID == 'g2'].iloc[-1]
+        self.assertEqual(last.home_wpa, 50. - last.home_wp)
+        self.assertEqual(combined.loc[combined.isTimeout, 'home_wpa'].tolist(),
+                         [0., 0.])
+
+def rowLoopTeamColumns(features):
+    """The row-by-row addTeamColumns that the cumulative parity replaced; the
+    plays must all be from one game."""
+    features = features.to_dict('records')
+    curTm = curOpp = None
+    playAfterKickoff = False
+    for row in features:
+        if row['isKickoff'] or playAfterKickoff:
+            curTm, curOpp = pbp.teamAndOpp(row)
+        else:
+            curTm, curOpp = pbp.teamAndOpp(row, curTm, curOpp)
+        row['team'], row['opp'] = curTm, curOpp
+        playAfterKickoff = row['isKickoff']
+
+    features = pd.DataFrame(features)
+    features.team.fillna(method='bfill', inplace=True)
+    features.opp.fillna(method='bfill', inplace=True)
+    features.team.fillna(method='ffill', inplace=True)
+    features.opp.fillna(method='ffill', inplace=True)
+    return features
+
+def fakeTeamAndOpp(struct, curTm=None, curOpp=None):
+    """Stands in for teamAndOpp: the rusher column holds the offensive team
+    itself, or NaN when the play's team can't be resolved."""
+    if pd.isnull(curTm):
+        curTm = struct['rusher']
+        if pd.isnull(curTm):
+            return np.nan, np.nan
+        game = GAMES[struct['bsID']]
+        return curTm, game['away'] if curTm == game['home'] else game['home']
+    if struct['hasClass_pos_change']:
+        return curOpp, curTm
+    return curTm, curOpp
+
+def makeDrives(bsID, rows):
+    """Builds plays from (isKickoff, rusher, hasClass_pos_change) tuples."""
+    isKickoff, rusher, posChange = zip(*rows)
+    return pd.DataFrame({
+        'bsID': bsID,
+        'detail': ['{} play {}'.format(bsID, i) for i in range(len(rows))],
+        'isKickoff': list(isKickoff),
+        'rusher': list(rusher),
+        'hasClass_pos_change': list(posChange),
+    })
+
+class AddTeamColumnsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.orig = pbp.teamAndOpp
+        pbp.teamAndOpp = fakeTeamAndOpp
+
+    def tearDown(self):
+        pbp.teamAndOpp = self.orig
+
+    def assertMatchesRowLoop(self, games):
+        both = pd.concat(games, ignore_index=True)
+        expected = pd.concat([rowLoopTeamColumns(g) for g in games],
+                             ignore_index=True)
+        actual = pbp.addTeamColumns(both, boxScores={})
+        pd.testing.assert_frame_equal(actual, expected)
+        return actual
+
+    def test_matches_row_loop(self):
+        nan = np.nan
+        g1 = makeDrives('g1', [
+            # the kickoff and the play after it can't be resolved, so the
+            # first segment is anchored on its third play
+            (True, nan, False),
+            (False, nan, False),
+            (False, 'nwe', False),
+            (False, nan, True),
+            (False, 'nwe', False),
+            (False, nan, True),
+            # a kickoff mid-game resets possession, and so does the play
+            # after it
+            (True, 'mia', True),
+            (False, nan, False),
+            (False, 'nwe', False),
+            (False, nan, True),
+            (False, nan, False),
+        ])
+        # g2 doesn't start with a kickoff, and its last segment never
+        # resolves, so it's filled from the segment before it
+        g2 = makeDrives('g2', [
+            (False, nan, False),
+            (False, nan, True),
+            (False, 'nyj', False),
+            (False, nan, True),
+            (False, nan, True),
+            (False, 'nyj', True),
+            (True, nan, False),
+            (False, nan, True),
+            (False, nan, False),
+        ])
+        actual = self.assertMatchesRowLoop([g1, g2])
+        self.assertEqual(
+            actual.team.tolist(),
+            ['nwe', 'nwe', 'nwe', 'mia', 'mia', 'nwe',
+             'mia', 'nwe', 'nwe', 'mia', 'mia',
+             'nyj', 'nyj', 'nyj', 'buf', 'nyj', 'buf',
+             'buf', 'buf', 'buf']
+        )
+        self.assertFalse(actual[['team', 'opp']].isnull().any().any())
+
+    def test_random_games(self):
+        rng = np.random.RandomState(0)
+        teams = {'g1': ['nwe', 'mia'], 'g2': ['buf', 'nyj']}
+        for _ in range(20):
+            games = []
+            for bsID in ('g1', 'g2'):
+                n = rng.randint(1, 40)
+                games.append(makeDrives(bsID, zip(
+                    rng.rand(n) < .15,
+                    [rng.choice(teams[bsID]) if r < .3 else np.nan
+                     for r in rng.rand(n)],
+                    rng.rand(n) < .3,
+                )))
+            self.assertMatchesRowLoop(games)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from tests import support
+
+from sportsref.pfr import pbp
+
+def loadCorpus():
+    """Loads the corpus of play detail strings, each with the dict that
+    parsePlayDetails returned for it before the grammar was precompiled (or
+    None if the string didn't parse).
+
+    :returns: A list of (detail, expected) pairs.
+    """
+    with open(support.fixturePath('play_details.json')) as f:
+        return [tuple(row) for row in json.load(f)]
+
+class ParsePlayDetailsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.corpus = loadCorpus()
+        pbp.parsePlayDetails.cache_clear()
+
+    def test_corpus(self):
+        for detail, expected in self.corpus:
+            self.assertEqual(pbp.parsePlayDetails(detail), expected, detail)
+
+    def test_bulk(self):
+        details = [d for d, _ in self.corpus]
+        expected = [e for _, e in self.corpus]
+        self.assertEqual(pbp.parseAllPlayDetails(details), expected)
+        # the same strings again, now from the memo
+        self.assertEqual(pbp.parseAllPlayDetails(details[::-1]),
+                         expected[::-1])
+
+    def test_missing(self):
+        for detail in (None, float('nan'), 3, ''):
+            self.assertIsNone(pbp.parsePlayDetails(detail))
+
+def dictsToFrame(dicts):
+    """Builds the details DataFrame the way expandDetails did before it went
+    column-wise: one row per dict, with blank rows for unparsed strings.
+    """
+    cols = {c for d in dicts if d for c in d.iterkeys()}
+    blankEntry = {c: np.nan for c in cols}
+    return pd.DataFrame([d if d else blankEntry for d in dicts])
+
+class ParsePlayDetailsFrameTest(unittest.TestCase):
+
+    def setUp(self):
+        self.corpus = loadCorpus()
+        pbp.parsePlayDetails.cache_clear()
+
+    def check(self, details, index=None, expectedDicts=None):
+        ser = pd.Series(details, index=index, dtype=object)
+        if expectedDicts is None:
+            expectedDicts = [pbp.parsePlayDetails(d) for d in details]
+        # the details frame always gets a fresh RangeIndex
+        expected = dictsToFrame(expectedDicts)
+        got, parsed = pbp.parsePlayDetailsFrame(ser)
+        self.assertEqual(parsed.tolist(),
+                         [d is not None for d in expectedDicts])
+        support.assertFramesIdentical(got, expected)
+
+    def test_corpus(self):
+        details = [d for d, _ in self.corpus]
+        expected = [e for _, e in self.corpus]
+        self.check(details, expectedDicts=expected)
+        self.check(details, index=range(100, 100 + len(details)),
+                   expectedDicts=expected)
+
+    def test_subsets(self):
+        details = [d for d, _ in self.corpus] + [None, np.nan]
+        rnd = random.Random(21)
+        for _ in range(50):
+            self.check(rnd.sample(details, rnd.randint(1, 40)))
+        # a single type of play, and strings that don't parse at all
+        self.check(['BradTo00 spiked the ball'] * 3)
+        self.check(['nothing here', None])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,275 @@
+import StringIO
+import re
+import sys
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+from pyquery import PyQuery as pq
+import requests
+
+from tests import support
+
+import sportsref
+from sportsref import utils
+
+def captureOutput(func, *args):
+    """Calls func(*args), capturing what it prints.
+
+    :returns: (return value, output) tuple.
+    """
+    stdout = sys.stdout
+    sys.stdout = out = StringIO.StringIO()
+    try:
+        ret = func(*args)
+    finally:
+        sys.stdout = stdout
+    return ret, out.getvalue()
+
+class RelURLsToIDsTest(unittest.TestCase):
+
+    URLS = [
+        '/players/B/BradTo00.htm',
+        '/players/B/BradTo00/gamelog/2014/',
+        '/boxscores/201409070nwe.htm',
+        '/teams/nwe/2014.htm',
+        '/years/2014/',
+        '/coaches/BeliBi0.htm',
+        '/officials/HochEd0r.htm',
+        '/schools/michigan/',
+        '/nowhere/at/all.htm',
+    ]
+
+    def setUp(self):
+        utils.relURLToID.cache_clear()
+
+    def test_matches_scalar(self):
+        urls = pd.Series(self.URLS * 2 + [np.nan], index=range(10, 29))
+        ids = utils.relURLsToIDs(urls)
+        self.assertTrue(ids.index.equals(urls.index))
+        self.assertEqual(ids.tolist()[:-1],
+                         [utils.relURLToID(u) for u in urls.tolist()[:-1]])
+        self.assertTrue(pd.isnull(ids.iloc[-1]))
+        self.assertEqual(ids.iloc[0], 'BradTo00')
+        self.assertEqual(ids.iloc[8], utils.NO_ID)
+
+    def test_matches_unmemoized(self):
+        # URLs that contain a type's keyword without matching its regex fall
+        # through to the next type, as in relURLToID
+        urls = self.URLS + [
+            '/players/', '/teams/nw/', '/boxscores/index.htm?x',
+            '/years/2014/teams/nwe/2014.htm', 'http://x.com/years/1999_AFL/',
+            '/schools/high_schools.cgi?id=abcdefgh&x=1',
+            u'/players/S/SmitJo\xe900.htm', '',
+        ] + ['/players/X/Play{:04d}.htm'.format(i) for i in range(500)]
+        ids, _ = captureOutput(utils.relURLsToIDs, urls)
+        expected, _ = captureOutput(
+            lambda: [utils.relURLToID.__wrapped__(url) for url in urls]
+        )
+        self.assertEqual(ids.tolist(), expected)
+        # and the memo now gives the same answers
+        memo = utils.relURLToID.cache_get_many((url,) for url in urls)
+        self.assertEqual([memo[url,] for url in urls], expected)
+
+    def test_shares_memo_and_warning(self):
+        _, out = captureOutput(utils.relURLsToIDs, self.URLS * 3)
+        self.assertEqual(out.count('NO MATCH'), 1)
+        self.assertEqual(utils.relURLToID.cache_info().misses, len(self.URLS))
+
+        # later lookups, bulk or single, hit the memo and don't warn again
+        _, out = captureOutput(utils.relURLsToIDs, self.URLS)
+        self.assertEqual(out, '')
+        _, out = captureOutput(utils.relURLToID, '/nowhere/at/all.htm')
+        self.assertEqual(out, '')
+        self.assertEqual(utils.relURLToID.cache_info().misses, len(self.URLS))
+
+def oldParseTable(table):
+    """parseTable as it was before it walked the raw lxml elements (and
+    before compactTypes), built on PyQuery and flattenLinks.
+    """
+    if not len(table):
+        return pd.DataFrame()
+    columns = [c.attrib['data-stat']
+               for c in table('thead tr[class=""] th[data-stat]')]
+    rows = list(table('tbody tr').not_('.thead, .stat_total').items())
+    data = [
+        [utils.flattenLinks(td) for td in row.items('td')]
+        for row in rows
+    ]
+    df = pd.DataFrame(data, columns=columns, dtype='float')
+    allClasses = set(
+        cls
+        for row in rows
+        if row.attr['class']
+        for cls in row.attr['class'].split()
+    )
+    for cls in allClasses:
+        df['hasClass_' + cls] = [
+            row.attr['class'] and
+            cls in row.attr['class'].split()
+            for row in rows
+        ]
+    if 'year_id' in df.columns and 'league_id' in df.columns:
+        df['year_id'] = df['league_id']
+        del df['league_id']
+    if 'year_id' in df.columns:
+        df['year_id'] = df.year_id.fillna(method='ffill')
+        df['year_id'] = df.year_id.map(lambda s: s[:4]).astype(int)
+        df.rename(columns={'year_id': 'year'}, inplace=True)
+    if 'game_date' in df.columns:
+        df.rename(columns={'game_date': 'bsID'}, inplace=True)
+    df.replace(re.compile(r'[\*\+]'), '', inplace=True)
+    return df
+
+# odd cells and rows that the fixture pages don't have
+EDGE_CASES = u'''
+<table id="edge">
+<thead>
+<tr class="over_header"><th data-stat="x">ignored</th></tr>
+<tr class=""><th data-stat="year_id">Year</th><th data-stat="league_id">Lg</th>
+<th data-stat="player">Player</th><th data-stat="game_date">Date</th>
+<th data-stat="pass_yds">Yds</th><th data-stat="awards">Awards</th></tr>
+</thead>
+<tbody>
+<tr class="full_table"><td>2013</td><td>2013*</td>
+<td><a href="/players/B/BradTo00.htm">Tom Brady</a>*</td>
+<td><a href="/boxscores/201309080buf.htm">2013-09-08</a></td>
+<td>288</td><td>PB+ <!-- note --> AP-1</td></tr>
+<tr class="thead"><td>Year</td></tr>
+<tr><td></td><td></td><td><a name="x">no href</a></td>
+<td><a href="/nowhere/at/all.htm">Lost</a></td><td>\u200b</td><td> </td></tr>
+<tr class="partial_table  injured"><td>2014</td><td>2014+</td>
+<td><span><a href="/players/E/EdelJu00.htm">Julian</a></span> E.</td>
+<td>x<a href="/boxscores/201409070nwe.htm">date</a>y</td><td>-12</td>
+<td><b>bold</b> tail</td></tr>
+<tr class="stat_total"><td>Total</td></tr>
+<tr class=""><td>2015</td><td>2015</td><td>Nobody</td><td></td>
+<td>3.5</td><td></td></tr>
+</tbody>
+</table>
+'''
+
+def fixtureTables():
+    """Yields (name, PyQuery table) for every table with an id on the
+    fixture pages, plus the edge cases above.
+    """
+    for path, fn in sorted(support.sitePages().items()):
+        with open(fn, 'rb') as f:
+            doc = pq(f.read().decode('utf-8'), parser='html')
+        for table in doc('table[id]').items():
+            yield path + '#' + table.attr['id'], table
+    yield 'edge', pq(EDGE_CASES, parser='html')('table#edge')
+
+class ParseTableTest(unittest.TestCase):
+
+    def setUp(self):
+        utils.relURLToID.cache_clear()
+
+    def test_matches_pyquery_version(self):
+        tables = list(fixtureTables())
+        self.assertGreater(len(tables), 10)
+        for name, table in tables:
+            try:
+                expected, _ = captureOutput(oldParseTable, table)
+                got, _ = captureOutput(utils.parseTable, table)
+                support.assertFramesIdentical(
+                    got, utils.compactTypes(expected)
+                )
+            except AssertionError as e:
+                raise AssertionError('{}: {}'.format(name, e))
+
+    def test_edge_cases(self):
+        df, out = captureOutput(utils.parseTable,
+                                pq(EDGE_CASES, parser='html')('table#edge'))
+        self.assertEqual(out.count('NO MATCH'), 1)
+        self.assertEqual(len(df), 4)
+        self.assertEqual(df.year.tolist(), [2013, 2013, 2014, 2015])
+        self.assertEqual(df.player.tolist(),
+                         ['BradTo00', 'no href', 'Julian E.', 'Nobody'])
+        self.assertEqual(df.bsID.tolist()[0], '201309080buf')
+        self.assertEqual(df.hasClass_injured.tolist(),
+                         [False, False, True, False])
+
+class ConcatTablesTest(unittest.TestCase):
+
+    def frame(self, teams, players):
+        df = pd.DataFrame({'team': teams, 'player': players,
+                           'pass_yds': np.arange(len(teams), dtype=float)})
+        return utils.compactTypes(df)
+
+    def test_union_categories(self):
+        reg = self.frame(['nwe', 'nwe', None], ['BradTo00', 'EdelJu00', None])
+        poffs = self.frame(['nwe', 'mia'], ['GronRo00', 'BradTo00'])
+        self.assertEqual(reg.team.dtype, 'category')
+        df = utils.concatTables((reg, poffs), ignore_index=True)
+        self.assertEqual(df.team.dtype, 'category')
+        self.assertEqual(df.player.dtype, 'category')
+        self.assertEqual(df.team.cat.categories.tolist(), ['mia', 'nwe'])
+        plain = pd.concat((reg.astype(object), poffs.astype(object)),
+                          ignore_index=True)
+        self.assertEqual(df.team.tolist()[:2] + df.team.tolist()[3:],
+                         ['nwe', 'nwe', 'nwe', 'mia'])
+        self.assertTrue(pd.isnull(df.team[2]))
+        self.assertEqual(df.player.astype(object).fillna('-').tolist(),
+                         plain.player.fillna('-').tolist())
+        self.assertEqual(df.pass_yds.tolist(), [0., 1., 2., 0., 1.])
+        # the inputs are left as they were
+        self.assertEqual(reg.team.cat.categories.tolist(), ['nwe'])
+
+    def test_missing_column(self):
+        reg = self.frame(['nwe'], ['BradTo00'])
+        poffs = self.frame(['mia'], ['BradTo00']).drop('team', axis=1)
+        df = utils.concatTables((reg, poffs), ignore_index=True,
+                                sort=False)
+        self.assertEqual(df.team.dtype, 'category')
+        self.assertEqual(df.player.dtype, 'category')
+        self.assertEqual(df.team.astype(object).tolist()[0], 'nwe')
+        self.assertTrue(pd.isnull(df.team[1]))
+
+    def test_kind_rpb(self):
+        frames = {'R': self.frame(['nwe'] * 3, ['BradTo00'] * 3),
+                  'P': self.frame(['nwe', 'mia'], ['BradTo00', 'TannRy00'])}
+
+        @sportsref.decorators.kindRPB
+        def gamelog(kind='R'):
+            return frames[kind].copy()
+
+        df = gamelog(kind='B')
+        self.assertEqual(len(df), 5)
+        self.assertEqual(df.team.dtype, 'category')
+        self.assertEqual(df.player.dtype, 'category')
+        self.assertEqual(df.game_type.tolist(), ['R'] * 3 + ['P'] * 2)
+
+class GetHTMLTest(unittest.TestCase):
+
+    def setUp(self):
+        support.resetCache()
+        self.backoff = utils.TIMEOUT_BACKOFF
+        self.timeout = sportsref.session.TIMEOUT
+        utils.TIMEOUT_BACKOFF = 0.001
+
+    def tearDown(self):
+        utils.TIMEOUT_BACKOFF = self.backoff
+        sportsref.session.configure(timeout=self.timeout)
+        support.resetCache()
+
+    def test_timeouts(self):
+        with support.FixtureServer(delay=0.3) as server:
+            sportsref.session.configure(timeout=0.05)
+            url = server.baseURL + '/teams/'
+            start = time.time()
+            with self.assertRaises(requests.Timeout):
+                utils.getHTML(url)
+            elapsed = time.time() - start
+            self.assertEqual(server.counts['/teams/'], utils.MAX_TRIES)
+            # waited 0.001 + 0.002 + ... between the tries
+            backoff = sum(0.001 * 2**i for i in range(utils.MAX_TRIES - 1))
+            self.assertGreaterEqual(elapsed, backoff)
+
+            # the failure isn't cached; the page loads once it's quick enough
+            sportsref.session.configure(timeout=5)
+            self.assertIn('teams_active', utils.getHTML(url))
+
+if __name__ == '__main__':
+    unittest.main()